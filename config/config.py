@@ -11,6 +11,9 @@ DEV_PAY_EXTERNAL = "172.18.0.12"
 # API details
 API_URL = "https://app-dev.rh-partner.com"
 
+# Maximum number of attendance records sent in a single upload
+UPLOAD_BATCH_SIZE = 2000
+
 # ZK device configuration
 ZK_IP = "192.168.100.201"
 ZK_PORT = 4370
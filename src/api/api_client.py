@@ -81,8 +81,8 @@ class APIClient:
             return False
 
     def get_auth_headers(self):
-        """Get headers with authentication tokens."""
-        if not self.authenticate():
+        """Get headers with authentication tokens, authenticating only when no token is held."""
+        if not self.jwt_token and not self.authenticate():
             raise Exception("Authentication required")
 
         return {
@@ -92,17 +92,32 @@ class APIClient:
             'Accept': 'application/json'
         }
 
-    def get_pointing_import(self):
-        headers = self.get_auth_headers()
+    def request(self, method, url, multipart=False, **kwargs):
+        """Send an authenticated request, re-authenticating and retrying once if the token expired."""
+        for attempt in range(2):
+            headers = self.get_auth_headers()
+            if multipart:
+                # Remove Content-Type as it will be set by requests for multipart/form-data
+                headers.pop('Content-Type', None)
+
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            if response.status_code != 401 or attempt:
+                return response
 
+            logger.warning("Authentication token expired, attempting to re-authenticate")
+            self.jwt_token = None
+            # Rewind any uploaded files so the retry sends them in full
+            for file_spec in (kwargs.get('files') or {}).values():
+                file_spec[1].seek(0)
 
-        response = self.session.get(
-            f"{self.api_url}/pay/api/companies/{self.company_id}/pointing-imports",
-            headers=headers
+    def get_pointing_import(self):
+        response = self.request(
+            'GET',
+            f"{self.api_url}/pay/api/companies/{self.company_id}/pointing-imports"
         )
         if response.status_code == 200:
             data = response.json()
-            print("Pointing import data retrieved successfully.")
+            logger.debug("Pointing import data retrieved successfully.")
             return {
                 "id": data.get("id"),
                 "status": data.get("status"),
@@ -115,38 +130,36 @@ class APIClient:
                 "created": data.get("created")
             }
         else:
-            print(f"Failed to retrieve pointing import data. Status code: {response.status_code}")
+            logger.error(f"Failed to retrieve pointing import data. Status code: {response.status_code}")
             response.raise_for_status()  # Raise an exception for other error status codes
 
-        print("Timeout reached: No content was retrieved within 30 seconds.")
+        logger.error("Timeout reached: No content was retrieved within 30 seconds.")
         raise Exception("Timeout reached: No content was retrieved within 30 seconds.")
 
     def get_pointings_with_job_id(self, job_execution_id):
         """Fetch pointings with filters, including jobExecutionId."""
-        headers = self.get_auth_headers()
-
         # Build query parameters
         params = {
             'jobExecutionId': job_execution_id,
         }
 
         try:
-            response = self.session.get(
+            response = self.request(
+                'GET',
                 f"{self.api_url}/pay/api/companies/{self.company_id}/pointings",
-                headers=headers,
                 params=params
             )
 
             if response.status_code == 200:
                 data = response.json()
-                print("Pointings data retrieved successfully.")
+                logger.debug("Pointings data retrieved successfully.")
                 return self.transform_data(data)  # Returns the list of PointingDTO
             else:
-                print(f"Failed to retrieve pointings. Status code: {response.status_code}")
+                logger.error(f"Failed to retrieve pointings. Status code: {response.status_code}")
                 response.raise_for_status()
 
         except Exception as e:
-            print(f"Error fetching pointings: {e}")
+            logger.error(f"Error fetching pointings: {e}")
             raise
 
     def upload_attendance(self, file_path):
@@ -155,38 +168,30 @@ class APIClient:
             logger.error(f"File not found: {file_path}")
             return {'success': False, 'message': 'File not found'}
 
+        with open(file_path, 'rb') as file:
+            return self.upload_attendance_file(os.path.basename(file_path), file)
+
+    def upload_attendance_file(self, filename, file):
+        """Upload attendance data from an open Excel file object (on disk or in memory) to the API."""
         try:
-            headers = self.get_auth_headers()
-            # Remove Content-Type as it will be set by requests for multipart/form-data
-            headers.pop('Content-Type', None)
-
-            with open(file_path, 'rb') as file:
-                files = {
-                    'file': (os.path.basename(file_path), file,
-                             'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
-                }
-
-                month = datetime.now().strftime("%Y-%m")
-                response = self.session.post(
-                    f"{self.api_url}/pay/api/companies/{self.company_id}/month-pointing/{month}/import",
-                    headers=headers,
-                    files=files
-                )
+            files = {
+                'file': (filename, file,
+                         'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+            }
+
+            month = datetime.now().strftime("%Y-%m")
+            response = self.request(
+                'POST',
+                f"{self.api_url}/pay/api/companies/{self.company_id}/month-pointing/{month}/import",
+                multipart=True,
+                files=files
+            )
 
             if response.status_code == 200:
-                # os.remove(file_path)
                 response_data = response.json()
                 job_execution_id = response_data.get("jobExecutionId")
                 logger.info(f"Job execution started with ID: {job_execution_id}")
                 return {'success': True, 'jobExecutionId': job_execution_id}
-            elif response.status_code == 401:
-                # Token might be expired, try to re-authenticate
-                logger.warning("Authentication token expired, attempting to re-authenticate")
-                if self.authenticate():
-                    # Retry with new token
-                    return self.upload_attendance(file_path)
-                else:
-                    return {'success': False, 'message': 'Re-authentication failed'}
             else:
                 logger.error(f"API upload failed: {response.status_code}")
                 logger.debug(f"Response: {response.text}")
@@ -198,10 +203,9 @@ class APIClient:
 
     def get_employees(self):
         try:
-            headers = self.get_auth_headers()
-            response = self.session.get(
-                f"{self.api_url}/companymanagement/api/companies/{self.company_id}/employees/minimal?includeInactive=false",
-                headers=headers
+            response = self.request(
+                'GET',
+                f"{self.api_url}/companymanagement/api/companies/{self.company_id}/employees/minimal?includeInactive=false"
             )
             response.raise_for_status()
             employees = response.json()
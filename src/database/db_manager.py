@@ -1,19 +1,65 @@
 import sqlite3
 import os
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
 import json
 from src.database.models import Config, User, AttendanceRecord, APIUploadLog
 
 logger = logging.getLogger(__name__)
 
+# Number of values bound in a single IN (...) clause
+MAX_SQL_PARAMS = 500
+
+# Columns the attendance record list may be ordered by
+ATTENDANCE_SORT_COLUMNS = ('timestamp', 'id', 'username', 'punch_type', 'processed')
+
+# WHERE clauses of the attendance record list, keyed by (filtered by processed, searched)
+_ATTENDANCE_WHERE = {
+    (False, False): '',
+    (True, False): 'WHERE processed = ? ',
+    (False, True): "WHERE (username LIKE ? ESCAPE '\\' OR timestamp LIKE ? ESCAPE '\\') ",
+    (True, True): "WHERE processed = ? AND (username LIKE ? ESCAPE '\\' OR timestamp LIKE ? ESCAPE '\\') ",
+}
+
+# Every list query variant is built once so repeated calls reuse the exact SQL text (and sqlite3's statement cache)
+_ATTENDANCE_LIST_SQL = {
+    (filtered, searched, order_by, paged):
+        f'SELECT * FROM attendance_records {where}ORDER BY {order_by} ASC, id ASC'
+        + (' LIMIT ? OFFSET ?' if paged else '')
+    for (filtered, searched), where in _ATTENDANCE_WHERE.items()
+    for order_by in ATTENDANCE_SORT_COLUMNS
+    for paged in (False, True)
+}
+_ATTENDANCE_COUNT_SQL = {
+    key: f'SELECT COUNT(*) FROM attendance_records {where}' for key, where in _ATTENDANCE_WHERE.items()
+}
+
+# Seconds get_config serves the config row from memory; save_config clears the cached row
+CONFIG_CACHE_TTL = 60
+
 
 class DatabaseManager:
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """Return the process-wide manager for the default database, creating it on first use."""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
     def __init__(self, db_path=None):
         if db_path is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # go two levels up
             db_path = os.path.join(base_dir, 'data', 'attendance.db')
         self.db_path = db_path
+        self._local = threading.local()
+        self._config_cache = None  # (config, expires_at)
         self.initialize_db()
 
     def get_connection(self):
@@ -22,6 +68,35 @@ class DatabaseManager:
         conn.row_factory = sqlite3.Row
         return conn
 
+    @contextmanager
+    def connection(self):
+        """Yield this thread's session connection if one is open, otherwise a short-lived connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self.get_connection()
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def session(self):
+        """Reuse a single connection for every call this thread makes inside the block."""
+        if getattr(self._local, 'conn', None) is not None:
+            # Already inside a session on this thread
+            yield
+            return
+
+        self._local.conn = self.get_connection()
+        try:
+            yield
+        finally:
+            self._local.conn.close()
+            self._local.conn = None
+
     def initialize_db(self):
         """Initialize database tables if they don't exist."""
         conn = self.get_connection()
@@ -57,6 +132,21 @@ class DatabaseManager:
         )
         ''')
 
+        # Let the filtered list and export queries range-scan an index instead of scanning and sorting
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_proc_ts ON attendance_records(processed, timestamp)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_proc_id ON attendance_records(processed, id)')
+
+        # Same for the other sort columns of the records list, unfiltered and filtered by processed
+        # (timestamp is already indexed by its UNIQUE constraint)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_username ON attendance_records(username)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_attendance_punch_type ON attendance_records(punch_type)')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_attendance_proc_username ON attendance_records(processed, username)'
+        )
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_attendance_proc_punch_type ON attendance_records(processed, punch_type)'
+        )
+
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS api_upload_logs (
             id INTEGER PRIMARY KEY,
@@ -69,51 +159,70 @@ class DatabaseManager:
         )
         ''')
 
+        # Last user list read from each device, shown while the users window re-reads the device
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS device_users (
+            device_ip TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            name TEXT,
+            refreshed_at TEXT NOT NULL,
+            PRIMARY KEY (device_ip, user_id)
+        )
+        ''')
+
         conn.commit()
         conn.close()
         logger.info("Database initialized successfully")
 
     def save_config(self, config):
         """Save or update a Config object."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT id FROM config LIMIT 1")
-        existing_config = cursor.fetchone()
+            cursor.execute("SELECT id FROM config LIMIT 1")
+            existing_config = cursor.fetchone()
 
-        if existing_config:
-            cursor.execute('''
-            UPDATE config SET 
-                company_id = ?, api_username = ?, api_password = ?, 
-                device_ip = ?, device_port = ?, collection_interval = ?, upload_interval = ?, import_interval = ?, updated_at = ? 
-            WHERE id = ?
-            ''', (
-                config.company_id, config.api_username, config.api_password,
-                config.device_ip, config.device_port, config.collection_interval,
-                config.upload_interval, config.import_interval, datetime.now(), existing_config['id']
-            ))
-        else:
-            cursor.execute('''
-            INSERT INTO config (
-                company_id, api_username, api_password, device_ip, device_port, collection_interval, upload_interval, import_interval
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                config.company_id, config.api_username, config.api_password,
-                config.device_ip, config.device_port, config.collection_interval, config.upload_interval, config.import_interval
-            ))
+            if existing_config:
+                cursor.execute('''
+                UPDATE config SET 
+                    company_id = ?, api_username = ?, api_password = ?, 
+                    device_ip = ?, device_port = ?, collection_interval = ?, upload_interval = ?, import_interval = ?, updated_at = ? 
+                WHERE id = ?
+                ''', (
+                    config.company_id, config.api_username, config.api_password,
+                    config.device_ip, config.device_port, config.collection_interval,
+                    config.upload_interval, config.import_interval, datetime.now(), existing_config['id']
+                ))
+            else:
+                cursor.execute('''
+                INSERT INTO config (
+                    company_id, api_username, api_password, device_ip, device_port, collection_interval, upload_interval, import_interval
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    config.company_id, config.api_username, config.api_password,
+                    config.device_ip, config.device_port, config.collection_interval, config.upload_interval, config.import_interval
+                ))
 
-        conn.commit()
-        conn.close()
+            conn.commit()
+        self._config_cache = None
         logger.info("Config saved successfully")
 
     def get_config(self):
-        """Retrieve the current Config as a Config object."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        """Retrieve the current Config as a Config object, cached for CONFIG_CACHE_TTL seconds."""
+        cache = self._config_cache
+        if cache is not None and time.monotonic() < cache[1]:
+            return cache[0]
 
-        cursor.execute("SELECT * FROM config LIMIT 1")
-        row = cursor.fetchone()
-        conn.close()
+        config = self._read_config()
+        self._config_cache = (config, time.monotonic() + CONFIG_CACHE_TTL)
+        return config
+
+    def _read_config(self):
+        with self.connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT * FROM config LIMIT 1")
+            row = cursor.fetchone()
 
         if row:
             return Config(
@@ -129,8 +238,7 @@ class DatabaseManager:
         if not records:
             return
 
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             cursor = conn.cursor()
             # TODO this tries to insert all the records found in the device even the old ones, find a better solution
             for record in records:
@@ -142,14 +250,11 @@ class DatabaseManager:
 
             conn.commit()
             logger.info(f"Saved {len(records)} attendance records to database")
-        finally:
-            conn.close()
 
     def save_attendance_record(self, record):
         """Save a signle AttendanceRecord."""
 
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             cursor = conn.cursor()
             record = AttendanceRecord.from_dict(record)
 
@@ -164,34 +269,29 @@ class DatabaseManager:
 
             conn.commit()
             logger.info(f"Saved attendance record with id {record.id} to database")
-        finally:
-            conn.close()
 
 
-    def delete_attendance_record(self, attendance_record):
+    def delete_attendance_records(self, record_ids):
         """
-        Delete a single AttendanceRecord in the database.
+        Delete several AttendanceRecords by id in a single transaction.
         """
-        conn = self.get_connection()
-        try:
+        if not record_ids:
+            return
+
+        with self.connection() as conn:
             cursor = conn.cursor()
-            query = '''
-                DELETE FROM attendance_records
-                WHERE id = ?
-            '''
-            cursor.execute(query, (attendance_record.id,))
+            for i in range(0, len(record_ids), MAX_SQL_PARAMS):
+                chunk = record_ids[i:i + MAX_SQL_PARAMS]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(f'DELETE FROM attendance_records WHERE id IN ({placeholders})', chunk)
             conn.commit()
-            logger.info(
-                f"Deleted attendance record for id {attendance_record.id}")
-        finally:
-            conn.close()
+        logger.info(f"Deleted {len(record_ids)} attendance records")
 
     def update_attendance_record(self, attendance_record):
         """
         Update a single AttendanceRecord in the database.
         """
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             cursor = conn.cursor()
             query = '''
                 UPDATE attendance_records
@@ -214,80 +314,154 @@ class DatabaseManager:
             conn.commit()
             logger.info(
                 f"Updated attendance record for id {attendance_record.id}")
-        finally:
-            conn.close()
 
-    def get_attendance_records(self, filter_processed=None, order_by='timestamp'):
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def get_attendance_records(self, filter_processed=None, order_by='timestamp', limit=None, offset=0,
+                               search=None):
+        """
+        Get attendance records, optionally one page at a time.
 
-        # Base query
-        query = f'''
-            SELECT * FROM attendance_records 
-        '''
+        search matches a substring of the username or timestamp. Rows are ordered by order_by then id
+        so that LIMIT/OFFSET pages don't overlap.
+        """
+        if order_by not in ATTENDANCE_SORT_COLUMNS:
+            raise ValueError(f"Unsupported sort column: {order_by}")
 
-        params = []
+        paged = limit is not None
+        query = _ATTENDANCE_LIST_SQL[(filter_processed is not None, bool(search), order_by, paged)]
+        params = self._attendance_filter_params(filter_processed, search)
+        if paged:
+            params += [limit, offset]
 
-        # Add WHERE clause if filtering by processed status
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+
+        return [self._row_to_attendance_record(row) for row in rows]
+
+    def count_attendance_records(self, filter_processed=None, search=None):
+        """Count the attendance records get_attendance_records would return without paging."""
+        query = _ATTENDANCE_COUNT_SQL[(filter_processed is not None, bool(search))]
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, self._attendance_filter_params(filter_processed, search))
+            return cursor.fetchone()[0]
+
+    @staticmethod
+    def _attendance_filter_params(filter_processed, search):
+        """Parameters for the WHERE clause selected from _ATTENDANCE_WHERE."""
+        params = []
         if filter_processed is not None:
-            query += 'WHERE processed = ? '
             params.append(filter_processed)
+        if search:
+            # Match the term literally: LIKE is already case-insensitive for ASCII, but % and _ are wildcards
+            term = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params += [f'%{term}%'] * 2
+        return params
+
+    def get_unprocessed_records_for_export(self, limit=None, after_timestamp=None):
+        """
+        Return unprocessed records as plain (username, timestamp, punch_type) tuples in timestamp order.
 
-        # Add ORDER BY clause
-        query += f'ORDER BY {order_by} ASC'
+        Pass the last timestamp of the previous page as after_timestamp to read the next page.
+        The rows are fetched in full so no read stays open while the uploader marks records as processed.
+        """
+        query = 'SELECT username, timestamp, punch_type FROM attendance_records WHERE processed = 0 '
+        params = []
 
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
+        if after_timestamp is not None:
+            query += 'AND timestamp > ? '
+            params.append(after_timestamp)
 
-        return [
-            AttendanceRecord(
-                id=row['id'],
-                user_id=row['user_id'],
-                username=row['username'],
-                timestamp=row['timestamp'],
-                status=row['status'],
-                punch_type=row['punch_type'],
-                processed=row['processed']
-            )
-            for row in rows
-        ]
+        query += 'ORDER BY timestamp ASC'
+
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [tuple(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def _row_to_attendance_record(row):
+        return AttendanceRecord(
+            id=row['id'],
+            user_id=row['user_id'],
+            username=row['username'],
+            timestamp=row['timestamp'],
+            status=row['status'],
+            punch_type=row['punch_type'],
+            processed=row['processed']
+        )
 
     def mark_records_processed(self, timestamps):
         """Mark attendance records as processed using their timestamps."""
         if not timestamps:
             return
 
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        placeholders = ','.join(['?'] * len(timestamps))
         formatted_timestamps = [ts.replace("T", " ") for ts in timestamps]
 
-        cursor.execute(f'''
-            UPDATE attendance_records 
-            SET processed = 1 
-            WHERE timestamp IN ({placeholders})
-        ''', formatted_timestamps)
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            # Stay under SQLite's bound-parameter limit; all chunks share one transaction
+            for i in range(0, len(formatted_timestamps), MAX_SQL_PARAMS):
+                chunk = formatted_timestamps[i:i + MAX_SQL_PARAMS]
+                placeholders = ','.join(['?'] * len(chunk))
+                cursor.execute(f'''
+                    UPDATE attendance_records 
+                    SET processed = 1 
+                    WHERE timestamp IN ({placeholders})
+                ''', chunk)
 
-        conn.commit()
-        conn.close()
+            conn.commit()
         logger.info(f"Marked {len(timestamps)} records as processed")
 
+    def save_device_users(self, device_ip, users, refreshed_at):
+        """Replace the stored user list of a device with (user_id, name) pairs read at refreshed_at."""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM device_users WHERE device_ip = ?', (device_ip,))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO device_users (device_ip, user_id, name, refreshed_at)
+                VALUES (?, ?, ?, ?)
+            ''', ((device_ip, str(user_id), name, refreshed_at) for user_id, name in users))
+
+            conn.commit()
+        logger.info(f"Stored {len(users)} users of device {device_ip}")
+
+    def get_device_users(self, device_ip):
+        """
+        Return the stored user list of a device as ({'id', 'name'} dicts, refreshed_at),
+        or ([], None) if it was never stored.
+        """
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT user_id, name, refreshed_at FROM device_users WHERE device_ip = ? ORDER BY rowid',
+                (device_ip,)
+            )
+            rows = cursor.fetchall()
+
+        if not rows:
+            return [], None
+        return [{'id': row['user_id'], 'name': row['name']} for row in rows], rows[0]['refreshed_at']
+
     def log_api_upload(self, log):
         """Log an API upload using an ApiUploadLog object."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+        with self.connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('''
-        INSERT INTO api_upload_logs (
-            batch_id, file_path, records_count, status, response_data
-        ) VALUES (?, ?, ?, ?, ?)
-        ''', (
-            log.batch_id, log.file_path, log.records_count, log.status,
-            json.dumps(log.response_data) if log.response_data else None
-        ))
+            cursor.execute('''
+            INSERT INTO api_upload_logs (
+                batch_id, file_path, records_count, status, response_data
+            ) VALUES (?, ?, ?, ?, ?)
+            ''', (
+                log.batch_id, log.file_path, log.records_count, log.status,
+                json.dumps(log.response_data) if log.response_data else None
+            ))
 
-        conn.commit()
-        conn.close()
-        logger.info(f"Logged API upload: {log.batch_id}, {log.status}")
+            conn.commit()
+        logger.info(f"Logged API upload: {log.batch_id}, {log.status}")
\ No newline at end of file
@@ -1,8 +1,11 @@
+import logging
 import re
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
 
+logger = logging.getLogger(__name__)
+
 
 @dataclass
 class Config:
@@ -64,7 +67,7 @@ class User:
         try:
             return User(id=zk_user.user_id, full_name=zk_user.name)
         except Exception as e:
-            print(f"Error parsing zk_user: {e}")
+            logger.error(f"Error parsing zk_user: {e}")
             return None
 
     @classmethod
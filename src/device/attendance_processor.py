@@ -1,5 +1,7 @@
 import logging
+import threading
 from zk import ZK, const
+from zk.exception import ZKErrorConnection, ZKNetworkError
 from datetime import datetime
 import time
 
@@ -15,92 +17,139 @@ class AttendanceProcessor:
         self.port = port
         self.zk = ZK(ip, port=port)
         self.conn = None
+        # pyzk keeps one socket and reply counter per connection, so device commands must not interleave
+        self._lock = threading.RLock()
+        self._connected_once = False
 
     def connect(self):
         """Connect to the ZK device."""
-        try:
-            self.conn = self.zk.connect()
-            logger.info(f"Connected to ZK device at {self.ip}:{self.port}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to connect to ZK device: {e}")
-            return False
+        with self._lock:
+            try:
+                self.conn = self.zk.connect()
+                self._connected_once = True
+                logger.info(f"Connected to ZK device at {self.ip}:{self.port}")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to connect to ZK device: {e}")
+                return False
 
     def disconnect(self):
         """Disconnect from the ZK device."""
+        with self._lock:
+            if self.conn:
+                self.conn.disconnect()
+                self.conn = None
+                logger.info("Disconnected from ZK device")
+
+    def _ensure_connected(self):
+        """Reconnect if the connection was dropped or closed since connect(); call with the lock held."""
         if self.conn:
+            return True
+        if not self._connected_once:
+            logger.error("Not connected to ZK device")
+            return False
+        logger.info("Reconnecting to ZK device")
+        return self.connect()
+
+    def _drop_connection(self, error):
+        """If error means the connection is gone, forget it so the next command reconnects; call with the lock held."""
+        if not isinstance(error, (ZKNetworkError, ZKErrorConnection, OSError)):
+            return
+        try:
             self.conn.disconnect()
-            logger.info("Disconnected from ZK device")
+        except Exception:
+            pass
+        self.conn = None
 
     def set_user(self, emp_id, code):
-        if not self.conn:
-            logger.error("Not connected to ZK device")
-            return None
-        try:
-            self.conn.set_user(
-                name=code,
-                user_id=str(emp_id)
-            )
-        except Exception as e:
-            logger.error(f"Error setting user: {e}")
+        """Create a user on the device. Returns True on success."""
+        with self._lock:
+            if not self._ensure_connected():
+                return None
+            try:
+                self.conn.set_user(
+                    name=code,
+                    user_id=str(emp_id)
+                )
+                return True
+            except Exception as e:
+                logger.error(f"Error setting user: {code} - error: {e}")
+                self._drop_connection(e)
+                return False
 
 
     def get_users(self):
-        """Get users from the device"""
-        if not self.conn:
-            logger.error("Not connected to ZK device")
-            return None
-        try:
-            users = self.conn.get_users()
-            logger.info(f"Retrieved {len(users)} users")
-            return users
-        except Exception as e:
-            logger.error(f"Error retrieving users: {e}")
-            return []
-
+        """Get users from the device, or None if they could not be read (an empty list means no users)."""
+        with self._lock:
+            if not self._ensure_connected():
+                return None
+            try:
+                users = self.conn.get_users()
+                logger.info(f"Retrieved {len(users)} users")
+                return users
+            except Exception as e:
+                logger.error(f"Error retrieving users: {e}")
+                self._drop_connection(e)
+                return None
+
+    def get_user_count(self):
+        """Get the number of users on the device without transferring the user records, or None if it can't be read."""
+        with self._lock:
+            if not self._ensure_connected():
+                return None
+            try:
+                self.conn.read_sizes()
+                logger.info(f"Device reports {self.conn.users} users")
+                return self.conn.users
+            except Exception as e:
+                logger.error(f"Error reading user count: {e}")
+                self._drop_connection(e)
+                return None
 
     def get_attendance(self, users):
         """Get attendance records from the device."""
-        if not self.conn:
-            logger.error("Not connected to ZK device")
-            return []
-
-        try:
-            attendance = self.conn.get_attendance()
-            processed_records = []
-
-            users_map = {user.user_id: user.name for user in users} if users else {}
-
-            for record in attendance:
-                username = users_map[record.user_id]
-                # Parse attendance data
-
-                processed_record = AttendanceRecord (
-                    uid = record.uid,
-                    user_id = record.user_id,
-                    username = username,
-                    timestamp = record.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
-                    status = record.status,
-                    punch_type = record.punch
-                )
-                processed_records.append(processed_record)
-
-            logger.info(f"Retrieved {len(processed_records)} attendance records")
-            return processed_records
-        except Exception as e:
-            logger.error(f"Error retrieving attendance data: {e}")
-            return []
+        with self._lock:
+            if not self._ensure_connected():
+                return []
+
+            try:
+                attendance = self.conn.get_attendance()
+                processed_records = []
+
+                users_map = {user.user_id: user.name for user in users} if users else {}
+
+                for record in attendance:
+                    username = users_map[record.user_id]
+                    # Parse attendance data
+
+                    processed_record = AttendanceRecord (
+                        uid = record.uid,
+                        user_id = record.user_id,
+                        username = username,
+                        timestamp = record.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                        status = record.status,
+                        punch_type = record.punch
+                    )
+                    processed_records.append(processed_record)
+
+                logger.info(f"Retrieved {len(processed_records)} attendance records")
+                return processed_records
+            except Exception as e:
+                logger.error(f"Error retrieving attendance data: {e}")
+                self._drop_connection(e)
+                return []
 
     def clear_attendance(self):
         """Clear attendance records from the device."""
-        if not self.conn:
-            logger.error("Not connected to ZK device")
-            return False
-
-        try:
-            self.conn.clear_attendance()
-            logger.info("Cleared attendance records from device")
-            return True
-        except Exception as e:
-            logger.error(f"Error clearing attendance data: {e}")
-            return False
\ No newline at end of file
+        with self._lock:
+            if not self._ensure_connected():
+                return False
+
+            try:
+                self.conn.clear_attendance()
+                logger.info("Cleared attendance records from device")
+                return True
+            except Exception as e:
+                logger.error(f"Error clearing attendance data: {e}")
+                self._drop_connection(e)
+                return False
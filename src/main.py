@@ -1,7 +1,6 @@
 import os
 import sys
 import logging
-import threading
 import time
 import tkinter as tk
 from tkinter import ttk, messagebox
@@ -12,12 +11,14 @@ from config.config import API_URL
 from src.api.api_client import APIClient
 from src.database.db_manager import DatabaseManager
 from src.device.attendance_processor import AttendanceProcessor
+from src.scheduler.services import Services
 from src.scheduler.user_importer import UserImporter
 from src.ui.config_interface import ConfigInterface
 from src.scheduler.attendance_collector import AttendanceCollector
 from src.scheduler.api_uploader import APIUploader
 from src.ui.records_interface import RecordsInterface
 from src.ui.users_interface import UsersInterface
+from src.ui.background import run_in_background
 
 # Define color constants
 COLOR_SUCCESS = "#4CAF50"  # Green for success states
@@ -25,7 +26,6 @@ COLOR_ERROR = "#F44336"  # Red for error/stopped states
 COLOR_WARNING = "#FF9800"  # Orange for warning states
 COLOR_NEUTRAL = "#757575"  # Gray for neutral states
 
-
 # Configure logging
 def setup_logging():
     """Set up logging configuration."""
@@ -52,15 +52,14 @@ class AttendanceSystemApp:
     def __init__(self):
         """Initialize the main application."""
         self.logger = setup_logging()
-        self.db_manager = DatabaseManager()
+        self.db_manager = DatabaseManager.get_instance()
         self.config = None
-        self.users = None
-        self.collector_thread = None
-        self.uploader_thread = None
-        self.user_importer_thread = None
-        self.collector = AttendanceCollector(self.db_manager)
-        self.uploader = APIUploader(self.db_manager)
-        self.user_importer = UserImporter(self.db_manager)
+        self.users_window = None  # hidden rather than destroyed when closed, reused by the next open
+        # One API session and device connection shared by all schedulers
+        self.services = Services(self.db_manager)
+        self.collector = AttendanceCollector(self.db_manager, services=self.services)
+        self.uploader = APIUploader(self.db_manager, services=self.services)
+        self.user_importer = UserImporter(self.db_manager, services=self.services)
         self.root = tk.Tk()
         self.root.withdraw()
 
@@ -78,17 +77,27 @@ class AttendanceSystemApp:
         self.connectivity_success = False
         self.logger.info("Attendance System initializing")
 
-    def run_connection_tests(self):
-        """Run device and API connection tests and return True if both pass."""
+    def run_connection_tests(self, on_complete=None):
+        """
+        Start the device and API connection tests in the background.
+
+        Results are applied on the Tk thread once the tests finish, then on_complete(success) is called.
+        """
+        run_in_background(self.root, self._do_connection_tests,
+                          lambda future: self._apply_test_results(future, on_complete))
+
+    def _do_connection_tests(self):
+        """Run the blocking connection tests and return (status updates, overall success)."""
+        results = []
         success = True
         try:
             # Get configuration
             self.config = self.db_manager.get_config()
             if not self.config:
                 self.logger.error("No configuration found. Skipping connection tests.")
-                self.update_status(self.device_test_var, "Device Connection", "Not Configured", "error")
-                self.update_status(self.api_test_var, "API Connection", "Not Configured", "error")
-                return False
+                results.append((self.device_test_var, "Device Connection", "Not Configured", "error"))
+                results.append((self.api_test_var, "API Connection", "Not Configured", "error"))
+                return results, False
 
             # Test device connection
             try:
@@ -98,16 +107,23 @@ class AttendanceSystemApp:
                 )
 
                 if processor.connect():
-                    self.users = processor.get_users() or []
+                    user_count = processor.get_user_count()
                     processor.disconnect()
-                    self.update_status(self.device_test_var, "Device Connection", "Connected", "success")
-                    self.logger.info(f"Device connection successful.")
+                    if user_count is None:
+                        results.append((self.device_test_var, "Device Connection",
+                                        "Connected, but reading users failed", "error"))
+                        self.logger.warning("Device connected but its user count could not be read.")
+                        success = False
+                    else:
+                        results.append((self.device_test_var, "Device Connection",
+                                        f"Connected (Users: {user_count})", "success"))
+                        self.logger.info(f"Device connection successful.")
                 else:
-                    self.update_status(self.device_test_var, "Device Connection", "Failed", "error")
+                    results.append((self.device_test_var, "Device Connection", "Failed", "error"))
                     self.logger.warning("Device connection test failed.")
                     success = False
             except Exception as e:
-                self.update_status(self.device_test_var, "Device Connection", "Error", "error")
+                results.append((self.device_test_var, "Device Connection", "Error", "error"))
                 self.logger.error(f"Device connection test error: {e}")
                 success = False
 
@@ -121,30 +137,41 @@ class AttendanceSystemApp:
                 )
 
                 if api_client.authenticate():
-                    self.update_status(self.api_test_var, "API Connection", "Connected", "success")
+                    results.append((self.api_test_var, "API Connection", "Connected", "success"))
                     self.logger.info("API authentication successful.")
                 else:
-                    self.update_status(self.api_test_var, "API Connection", "Failed", "error")
+                    results.append((self.api_test_var, "API Connection", "Failed", "error"))
                     self.logger.warning("API authentication test failed.")
                     success = False
             except Exception as e:
-                self.update_status(self.api_test_var, "API Connection", "Error", "error")
+                results.append((self.api_test_var, "API Connection", "Error", "error"))
                 self.logger.error(f"API connection test error: {e}")
                 success = False
 
         except Exception as e:
             self.logger.error(f"Unexpected error in connection tests: {e}")
-            self.update_status(self.device_test_var, "Device Connection", "Error", "error")
-            self.update_status(self.api_test_var, "API Connection", "Error", "error")
+            results.append((self.device_test_var, "Device Connection", "Error", "error"))
+            results.append((self.api_test_var, "API Connection", "Error", "error"))
             success = False
 
+        return results, success
+
+    def _apply_test_results(self, future, on_complete):
+        """Show the connection test status updates on the Tk thread and report the overall result."""
+        results, success = future.result()
+        for update in results:
+            self.update_status(*update)
+        self._finish_connection_tests(success, on_complete)
+
+    def _finish_connection_tests(self, success, on_complete):
         self.connectivity_success = success
         # Update test button text based on results
         if hasattr(self, 'test_button'):
             self.test_button.config(
                 text="Re-run Connection Tests" if self.connectivity_success else "Retry Connection Tests")
 
-        return success
+        if on_complete:
+            on_complete(success)
 
     def update_status(self, var, component, status, status_type):
         """Update a status variable with formatted text and color."""
@@ -293,9 +320,7 @@ class AttendanceSystemApp:
             self.status_var.set("System ready to start")
             self.status_label.config(style='Warning.TLabel')
             # Automatically run connection tests on startup and start system if tests pass
-            self.run_connection_tests()
-            if self.connectivity_success:
-                self.start_system()
+            self.run_connection_tests(on_complete=self.on_startup_tests_complete)
         else:
             self.status_var.set("System not configured")
             self.status_label.config(style='Error.TLabel')
@@ -318,12 +343,16 @@ class AttendanceSystemApp:
         self.update_status(self.api_test_var, "API Connection", "Testing...", "warning")
         self.api_status_label.config(style='Warning.TLabel')
 
-        # Allow the UI to update before starting tests
-        self.root.update_idletasks()
+        # Run the actual tests in the background; the results are shown once they finish
+        self.run_connection_tests(on_complete=self.show_test_results)
 
-        # Run the actual tests
-        result = self.run_connection_tests()
+    def on_startup_tests_complete(self, result):
+        """Start the system automatically when the startup connection tests pass."""
+        if result:
+            self.start_system()
 
+    def show_test_results(self, result):
+        """Update the connection test widgets with the outcome of a test run."""
         # Update the results summary
         if result:
             self.test_results_var.set("✓ All connections successful")
@@ -370,7 +399,7 @@ class AttendanceSystemApp:
         config_interface.show()
 
     def start_collectors(self):
-        """Start the attendance collectors in background threads."""
+        """Start the attendance collectors on the background scheduler thread."""
         self.config = self.db_manager.get_config()
         if not self.config:
             self.logger.error("No configuration found. Please configure the system first.")
@@ -380,29 +409,10 @@ class AttendanceSystemApp:
         upload_interval = self.config.upload_interval
         import_interval = self.config.import_interval
 
-        # Start attendance collector
-        self.collector_thread = threading.Thread(
-            target=self.collector.start_scheduler,
-            args=(self.users, collection_interval,),
-            daemon=True
-        )
-        self.collector_thread.start()
-
-        # Start API uploader
-        self.uploader_thread = threading.Thread(
-            target=self.uploader.start_scheduler,
-            args=(upload_interval,),
-            daemon=True
-        )
-        self.uploader_thread.start()
-
-        # Start User Importer
-        self.user_importer_thread = threading.Thread(
-            target=self.user_importer.start_scheduler,
-            args=(import_interval,),
-            daemon=True
-        )
-        self.user_importer_thread.start()
+        # All three jobs run on the shared scheduler hub thread
+        self.collector.start_scheduler(collection_interval)
+        self.uploader.start_scheduler(upload_interval)
+        self.user_importer.start_scheduler(import_interval)
 
         self.logger.info(f"Attendance collector started with interval of {collection_interval} minutes")
         self.logger.info(f"API uploader started with interval of {upload_interval} hours")
@@ -486,15 +496,20 @@ class AttendanceSystemApp:
 
     def open_list_users(self):
         """Open the users window (ensuring styling consistency)."""
-        users_interface = UsersInterface(self.root, self.users, self.db_manager)
+        if self.users_window is not None and self.users_window.root.winfo_exists():
+            self.users_window.reopen()
+            return
+
+        users_interface = UsersInterface(self.root, db_manager=self.db_manager, services=self.services)
+        self.users_window = users_interface
         orig_show = users_interface.show
         users_interface.show = lambda: None
         orig_show()
 
     def open_list_records(self):
         """Open the records window (ensuring styling consistency)."""
-        self.collector.collect_attendance(self.users)
-        records_interface = RecordsInterface(self.root, self.users, self.db_manager)
+        records_interface = RecordsInterface(self.root, db_manager=self.db_manager, collector=self.collector,
+                                             uploader=self.uploader, services=self.services)
         orig_show = records_interface.show
         records_interface.show = lambda: None
         orig_show()
@@ -1,110 +1,173 @@
+import io
+import itertools
 import logging
-import schedule
 import time
 import os
+import random
+import threading
 import uuid
-from datetime import datetime, timedelta
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import requests
+import xlsxwriter
 
 from src.database.db_manager import DatabaseManager
-from src.api.api_client import APIClient
-from config.config import API_URL
+from src.scheduler.scheduler_hub import default_hub
+from src.scheduler.services import Services
+from config.config import UPLOAD_BATCH_SIZE
 from src.database.models import APIUploadLog
 
 logger = logging.getLogger(__name__)
 
+# Column headers and punch type labels expected by the pointing import
+EXPORT_COLUMNS = ('code', 'Nom', 'time', 'type')
+# Indexed by punch_type: 0 = entree, 1 = sortie
+_PUNCH_LABELS = ('entree', 'sortie')
+
+# Pointing import polling: start fast, back off exponentially up to a cap
+POLL_INITIAL_DELAY = 0.5  # seconds
+POLL_MAX_DELAY = 8.0  # seconds
+POLL_SERVER_ERROR_RETRIES = 3
+
 
 class APIUploader:
-    def __init__(self, db_manager=None):
+    def __init__(self, db_manager=None, poll_timeout_seconds=30, hub=None, services=None):
         """Initialize the API uploader with a database manager."""
-        self.db_manager = db_manager or DatabaseManager()
+        self.db_manager = db_manager or DatabaseManager.get_instance()
+        self.services = services or Services(self.db_manager)
         self.api_client = None
         self.running = False
+        self.poll_timeout_seconds = poll_timeout_seconds
+        self.hub = hub or default_hub
+        self._job_id = None
+        # Held for a whole upload; the scheduler and the records window may both start one
+        self._upload_lock = threading.Lock()
+        # Prepares the next export file while the current one is uploading
+        self._export_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="excel-export")
 
         # Ensure exports directory exists
         os.makedirs('exports', exist_ok=True)
 
     def initialize(self):
-        """Initialize the API client with config from the database."""
-        config = self.db_manager.get_config()
-        if not config:
-            logger.error("No configuration found in database")
-            return False
-
-        self.api_client = APIClient(
-            api_url=API_URL,
-            company_id=config.company_id,
-            username=config.api_username,
-            password=config.api_password
-        )
-
-        return self.api_client.authenticate()
-
-    def create_excel_report(self, records):
-        """Create an Excel report from attendance records."""
-        if not records:
+        """Initialize the API client from the shared services."""
+        self.api_client = self.services.get_api_client()
+        return self.api_client is not None
+
+    def create_excel_report(self, records, batch_id=None):
+        """Create an Excel report from (username, timestamp, punch_type) tuples (a list or a lazy iterator)."""
+        records = iter(records)
+        first_record = next(records, None)
+        if first_record is None:
             logger.info("No records to export")
             return None
 
         # Create a unique filename
-        batch_id = str(uuid.uuid4())[:8]
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        filename = f"exports/attendance_{timestamp}_{batch_id}.xlsx"
-
-        # Create DataFrame from records
-        df = pd.DataFrame(records)
-
-        punch_mapping = {
-            0: 'entree',
-            1: 'sortie'
-        }
-
-        # Format the DataFrame for export
-        # You might need to adjust this based on your exact API requirements
-        export_df = pd.DataFrame({
-            'code': df['username'],
-            'Nom': None,
-            'time': df['timestamp'],
-            'type': df['punch_type'].map(punch_mapping)  # Map 0 to 'entree' and 1 to 'sortie'
-        })
-
-        # Save to Excel
-        export_df.to_excel(filename, index=False)
-        logger.info(f"Created Excel report with {len(records)} records at {filename}")
+        batch_id = batch_id or str(uuid.uuid4())[:8]
+        created = datetime.now().strftime('%Y%m%d%H%M%S')
+        filename = f"attendance_{created}_{batch_id}.xlsx"
+
+        # Build the workbook in memory; it is only written to exports/ if the upload fails.
+        # Timestamps are already stored as text.
+        content = io.BytesIO()
+        workbook = xlsxwriter.Workbook(content, {'in_memory': True})
+        worksheet = workbook.add_worksheet('Sheet1')
+        worksheet.write_row(0, 0, EXPORT_COLUMNS)
+        unknown_punches = 0
+        for row_num, (username, timestamp, punch_type) in enumerate(
+                itertools.chain((first_record,), records), start=1):
+            if punch_type in (0, 1):
+                label = _PUNCH_LABELS[punch_type]
+            else:
+                label = None
+                unknown_punches += 1
+            worksheet.write_row(row_num, 0, (username, None, timestamp, label))
+        # Records come in timestamp order; the next segment starts after the last one written
+        last_timestamp = timestamp
+        workbook.close()
+        if unknown_punches:
+            logger.warning(f"{unknown_punches} records in {filename} have an unknown punch type and were left blank")
+        content.seek(0)
+        logger.info(f"Created Excel report {filename} with {row_num} records")
 
         return {
             'batch_id': batch_id,
-            'file_path': filename,
-            'records_count': len(records)
+            'file_name': filename,
+            'file_path': os.path.join('exports', filename),
+            'content': content,
+            'records_count': row_num,
+            'last_timestamp': last_timestamp
         }
 
     def upload_data(self):
-        """Process unprocessed attendance records and upload to API."""
-        if not self.api_client:
-            if not self.initialize():
-                logger.error("Failed to initialize API client")
-                return
-
-        # Get unprocessed records
-        records = self.db_manager.get_attendance_records()
-        if not records:
-            logger.info("No unprocessed attendance records to upload")
-            return
+        """
+        Process unprocessed attendance records and upload them to the API in batches.
 
-        # Create Excel report
-        export_info = self.create_excel_report(records)
-        if not export_info:
-            return
+        Returns False without uploading if another upload is still running or the API client is unavailable.
+        """
+        if not self._upload_lock.acquire(blocking=False):
+            logger.info("An upload is already running, skipping this one")
+            return False
+
+        try:
+            return self._upload()
+        finally:
+            self._upload_lock.release()
+
+    def _upload(self):
+        """Run one upload; the caller holds the upload lock."""
+        # Reuse one database connection for the whole run
+        with self.db_manager.session():
+            if not self.api_client:
+                if not self.initialize():
+                    logger.error("Failed to initialize API client")
+                    return False
+
+            # Every segment of this run shares one batch id, suffixed with the segment number
+            run_id = str(uuid.uuid4())[:8]
+            next_export = self._export_pool.submit(self.export_segment, None, f"{run_id}-1")
+            for segment in itertools.count(1):
+                export_info = next_export.result()
+                if not export_info:
+                    if segment == 1:
+                        logger.info("No unprocessed attendance records to upload")
+                    break
+
+                # Build the next file while this one is being uploaded and imported
+                next_export = self._export_pool.submit(
+                    self.export_segment, export_info['last_timestamp'], f"{run_id}-{segment + 1}"
+                )
+
+                # Stop on the first failed batch; earlier batches stay marked as processed
+                if not self.upload_export(export_info):
+                    next_export.cancel()
+                    break
+        return True
+
+    def export_segment(self, after_timestamp, batch_id):
+        """Export the next batch of unprocessed records after after_timestamp to an Excel report."""
+        # A list of at most UPLOAD_BATCH_SIZE rows: the read is finished before the upload thread writes
+        records = self.db_manager.get_unprocessed_records_for_export(
+            limit=UPLOAD_BATCH_SIZE, after_timestamp=after_timestamp
+        )
+        return self.create_excel_report(records, batch_id=batch_id)
 
+    def save_export(self, export_info):
+        """Write an in-memory export to its file path so a failed upload can be inspected later."""
+        with open(export_info['file_path'], 'wb') as file:
+            file.write(export_info['content'].getbuffer())
+
+    def upload_export(self, export_info):
+        """Upload a single exported batch of attendance records. Returns True if the API accepted it."""
         # Upload to API
         try:
-            response = self.api_client.upload_attendance(export_info['file_path'])
+            response = self.api_client.upload_attendance_file(export_info['file_name'], export_info['content'])
 
             if response.get('success', False):
                 job_execution_id = response.get('jobExecutionId')
-                end_time = datetime.now() + timedelta(seconds=30)
-                while end_time > datetime.now() :
-                    pointing_import = self.api_client.get_pointing_import()
+                end_time = time.monotonic() + self.poll_timeout_seconds
+                delay = POLL_INITIAL_DELAY
+                while end_time > time.monotonic():
+                    pointing_import = self.get_pointing_import_with_retry()
                     import_status = pointing_import['status']
                     if import_status == "COMPLETED":
                         logger.info("Pointing import completed successfully.")
@@ -112,13 +175,15 @@ class APIUploader:
                         attendance_records = self.api_client.get_pointings_with_job_id(job_execution_id)
                         if len(attendance_records) > 0:
                             self.db_manager.mark_records_processed(attendance_records)
-                        return
+                        break
                     elif import_status == "STARTED" or import_status == "STARTING":
                         logger.warning("The import pointing request didn't complete yet")
-                        time.sleep(2)
+                        time.sleep(min(delay, max(0, end_time - time.monotonic())))
+                        delay = min(delay * 2, POLL_MAX_DELAY)
                     elif import_status == "FAILED" or import_status == "STOPPED":
                         logger.error("Pointing import failed. Please check the API logs or error details.")
 
+                        self.save_export(export_info)
                         self.db_manager.log_api_upload(
                             APIUploadLog(
                                 batch_id=export_info['batch_id'],
@@ -128,13 +193,10 @@ class APIUploader:
                                 response_data=pointing_import
                             )
                         )
-                        return
+                        return False
                     else:
                         raise Exception("Pointing Import with unknown status")
 
-
-                # self.db_manager.delete_processed_records(saved_timestamps)
-
                 # Log successful upload
                 self.db_manager.log_api_upload(
                     APIUploadLog(
@@ -146,9 +208,11 @@ class APIUploader:
                     )
                 )
 
-                logger.info(f"Successfully uploaded {len(records)} attendance records to API")
+                logger.info(f"Successfully uploaded {export_info['records_count']} attendance records to API")
+                return True
             else:
                 # Log failed upload
+                self.save_export(export_info)
                 self.db_manager.log_api_upload(
                     APIUploadLog(
                         batch_id=export_info['batch_id'],
@@ -160,9 +224,11 @@ class APIUploader:
                 )
 
                 logger.error(f"Failed to upload attendance records: {response.get('message', 'Unknown error')}")
+                return False
 
         except Exception as e:
             # Log exception
+            self.save_export(export_info)
             self.db_manager.log_api_upload(
                 APIUploadLog(
                     batch_id=export_info['batch_id'],
@@ -174,6 +240,20 @@ class APIUploader:
             )
 
             logger.error(f"Error uploading attendance records: {e}")
+            return False
+
+    def get_pointing_import_with_retry(self):
+        """Fetch the pointing import status, retrying server errors with a jittered, growing delay."""
+        for attempt in range(POLL_SERVER_ERROR_RETRIES):
+            try:
+                return self.api_client.get_pointing_import()
+            except requests.HTTPError as e:
+                status_code = e.response.status_code if e.response is not None else None
+                if status_code is None or status_code < 500 or attempt == POLL_SERVER_ERROR_RETRIES - 1:
+                    raise
+                wait = random.uniform(2, 4) * (attempt + 1)
+                logger.warning(f"Pointing import status returned {status_code}, retrying in {wait:.1f}s")
+                time.sleep(wait)
 
     def start_scheduler(self, interval_hours=1):
         """Start the API upload scheduler."""
@@ -181,18 +261,14 @@ class APIUploader:
             logger.warning("Scheduler is already running")
             return
 
-        # Schedule regular runs
-        schedule.every(interval_hours).hours.do(self.upload_data)
-
+        self._job_id = self.hub.every(interval_hours * 3600, self.upload_data)
         self.running = True
         logger.info(f"API uploader scheduled to run every {interval_hours} hours")
 
-        while self.running:
-            schedule.run_pending()
-            time.sleep(1)
-
     def stop_scheduler(self):
         """Stop the API upload scheduler."""
         self.running = False
-        schedule.clear()
+        if self._job_id is not None:
+            self.hub.cancel(self._job_id)
+            self._job_id = None
         logger.info("API uploader scheduler stopped")
\ No newline at end of file
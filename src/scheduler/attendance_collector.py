@@ -1,73 +1,87 @@
 import logging
-import time
-import schedule
-from datetime import datetime
+import threading
 
-from src.device.attendance_processor import AttendanceProcessor
 from src.database.db_manager import DatabaseManager
+from src.scheduler.services import Services
+from src.scheduler.scheduler_hub import default_hub
 
 logger = logging.getLogger(__name__)
 
 
 class AttendanceCollector:
-    def __init__(self, db_manager=None):
+    def __init__(self, db_manager=None, hub=None, services=None):
         """Initialize the attendance collector with a database manager."""
-        self.db_manager = db_manager or DatabaseManager()
+        self.db_manager = db_manager or DatabaseManager.get_instance()
+        self.services = services or Services(self.db_manager)
         self.processor = None
         self.running = False
+        self.hub = hub or default_hub
+        self._job_id = None
+        # Held for a whole collection; the scheduler and the records window may both start one
+        self._collect_lock = threading.Lock()
 
     def initialize(self):
-        """Initialize the attendance processor with config from the database."""
-        config = self.db_manager.get_config()
-        if not config:
-            logger.error("No configuration found in database")
+        """Initialize the attendance processor from the shared services."""
+        self.processor = self.services.get_processor()
+        return self.processor is not None
+
+    def collect_attendance(self, users=None):
+        """
+        Collect attendance data and save to database.
+
+        Returns False without collecting if another collection is still running or the device is unavailable.
+        """
+        if not self._collect_lock.acquire(blocking=False):
+            logger.info("A collection is already running, skipping this one")
             return False
 
-        self.processor = AttendanceProcessor(
-            ip=config.device_ip,
-            port=config.device_port
-        )
-
-        return self.processor.connect()
-
-    def collect_attendance(self, users):
-        """Collect attendance data and save to database."""
-        if not self.processor:
-            if not self.initialize():
-                logger.error("Failed to initialize attendance processor")
-                return
-
-        logger.info("Collecting attendance data...")
-        attendance_records = self.processor.get_attendance(users)
-
-        if attendance_records and len(attendance_records) > 0:
-            self.db_manager.save_attendance_records(attendance_records)
-            logger.info(f"Collected and saved {len(attendance_records)} attendance records")
-        else:
-            logger.info("No new attendance records to collect")
-
-    def start_scheduler(self, users, interval_minutes=60):
+        try:
+            return self._collect(users)
+        finally:
+            self._collect_lock.release()
+
+    def _collect(self, users):
+        """Run one collection; the caller holds the collection lock."""
+        # Reuse one database connection for the whole run
+        with self.db_manager.session():
+            if not self.processor:
+                if not self.initialize():
+                    logger.error("Failed to initialize attendance processor")
+                    return False
+
+            # Users are resolved lazily so callers don't need to pull them up front
+            if not users:
+                users = self.processor.get_users()
+                if users is None:
+                    logger.error("Could not read the device users, attendance not collected")
+                    return False
+
+            logger.info("Collecting attendance data...")
+            attendance_records = self.processor.get_attendance(users)
+
+            if attendance_records and len(attendance_records) > 0:
+                self.db_manager.save_attendance_records(attendance_records)
+                logger.info(f"Collected and saved {len(attendance_records)} attendance records")
+            else:
+                logger.info("No new attendance records to collect")
+            return True
+
+    def start_scheduler(self, interval_minutes=60):
         """Start the attendance collection scheduler."""
         if self.running:
             logger.warning("Scheduler is already running")
             return
 
-        # First run immediately
-        self.collect_attendance(users)
-
-        # Schedule regular runs
-        schedule.every(interval_minutes).minutes.do(self.collect_attendance)
-
+        # First run immediately on the scheduler thread, then every interval
+        self._job_id = self.hub.every(interval_minutes * 60, self.collect_attendance, run_now=True)
         self.running = True
         logger.info(f"Attendance collector scheduled to run every {interval_minutes} minutes")
 
-        while self.running:
-            schedule.run_pending()
-            time.sleep(1)
-
     def stop_scheduler(self):
         """Stop the attendance collection scheduler."""
         self.running = False
-        schedule.clear()
+        if self._job_id is not None:
+            self.hub.cancel(self._job_id)
+            self._job_id = None
 
         logger.info("Attendance collector scheduler stopped")
\ No newline at end of file
@@ -0,0 +1,74 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerHub:
+    """Runs the periodic jobs of several schedulers on one shared thread."""
+
+    def __init__(self):
+        """Initialize an empty hub; the worker thread starts with the first job."""
+        self._jobs = []  # heap of (deadline, job_id, job, interval_seconds)
+        self._job_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def every(self, interval_seconds, job, run_now=False):
+        """Run job every interval_seconds (first run immediately if run_now) and return its job id."""
+        job_id = next(self._job_ids)
+        deadline = time.monotonic() + (0 if run_now else interval_seconds)
+
+        with self._lock:
+            heapq.heappush(self._jobs, (deadline, job_id, job, interval_seconds))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="scheduler-hub", daemon=True)
+                self._thread.start()
+
+        self._wakeup.set()
+        return job_id
+
+    def cancel(self, job_id):
+        """Remove a single job; the other jobs keep their schedule."""
+        with self._lock:
+            self._jobs = [entry for entry in self._jobs if entry[1] != job_id]
+            heapq.heapify(self._jobs)
+
+        self._wakeup.set()
+
+    def _run(self):
+        """Sleep until the earliest deadline, run that job and push its next deadline."""
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                if not self._jobs:
+                    self._thread = None
+                    return
+                deadline, job_id, job, interval_seconds = self._jobs[0]
+
+                now = time.monotonic()
+                remaining = deadline - now
+                if remaining <= 0:
+                    # Keep the original cadence, but don't replay runs missed while the job was late
+                    next_deadline = deadline + interval_seconds
+                    if next_deadline <= now:
+                        next_deadline = now + interval_seconds
+                    heapq.heapreplace(self._jobs, (next_deadline, job_id, job, interval_seconds))
+
+            if remaining > 0:
+                # Woken early whenever a job is added or cancelled
+                self._wakeup.wait(remaining)
+                continue
+
+            try:
+                job()
+            except Exception as e:
+                logger.error(f"Scheduled job {job_id} failed: {e}")
+
+
+# Hub shared by the collector, uploader and user importer unless another one is injected
+default_hub = SchedulerHub()
@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+from src.database.db_manager import DatabaseManager
+from src.api.api_client import APIClient
+from config.config import API_URL
+from src.device.attendance_processor import AttendanceProcessor
+
+logger = logging.getLogger(__name__)
+
+# Seconds the device user list is reused before the device is read again
+USERS_CACHE_TTL = 120
+
+# Format of the refreshed_at time kept with a device user list
+REFRESHED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class Services:
+    """Connections shared by the schedulers and windows: one database manager, API client and device processor."""
+
+    def __init__(self, db_manager=None):
+        """Initialize the container; connections are opened on first use."""
+        self.db_manager = db_manager or DatabaseManager.get_instance()
+        self.api_client = None
+        self.processor = None
+        self._lock = threading.Lock()
+        self._users = None  # (users, monotonic read time, refreshed_at) of the last device user list read
+
+    def get_api_client(self):
+        """Return the shared API client, creating and authenticating it on first use."""
+        with self._lock:
+            if self.api_client is None:
+                config = self.db_manager.get_config()
+                if not config:
+                    logger.error("No configuration found in database")
+                    return None
+
+                api_client = APIClient(
+                    api_url=API_URL,
+                    company_id=config.company_id,
+                    username=config.api_username,
+                    password=config.api_password
+                )
+                if not api_client.authenticate():
+                    return None
+                self.api_client = api_client
+
+            return self.api_client
+
+    def get_processor(self):
+        """Return the shared attendance processor, connecting to the device on first use."""
+        with self._lock:
+            if self.processor is None:
+                config = self.db_manager.get_config()
+                if not config:
+                    logger.error("No configuration found in database")
+                    return None
+
+                processor = AttendanceProcessor(
+                    ip=config.device_ip,
+                    port=config.device_port
+                )
+                if not processor.connect():
+                    return None
+                self.processor = processor
+
+            return self.processor
+
+    def get_cached_users(self):
+        """Return (users, refreshed_at) if the device user list was read less than USERS_CACHE_TTL ago, else None."""
+        cached = self._users
+        if cached and time.monotonic() - cached[1] < USERS_CACHE_TTL:
+            return cached[0], cached[2]
+        return None
+
+    def get_users(self, force_refresh=False):
+        """
+        Return the device users as (users, refreshed_at), reading the device unless a recent list is cached.
+
+        Each device read is also stored in the device_users table. Raises ConnectionError if the device is unreachable.
+        """
+        if not force_refresh:
+            cached = self.get_cached_users()
+            if cached:
+                return cached
+
+        processor = self.get_processor()
+        users = processor.get_users() if processor else None
+        if users is None:
+            raise ConnectionError("could not connect to the device")
+
+        refreshed_at = datetime.now().strftime(REFRESHED_AT_FORMAT)
+        if users:
+            self._users = (users, time.monotonic(), refreshed_at)
+            try:
+                self.db_manager.save_device_users(
+                    processor.ip, [(user.user_id, user.name) for user in users], refreshed_at
+                )
+            except Exception as e:
+                # The list is still returned, it just won't be available from the database next time
+                logger.error(f"Error storing the device user list: {e}")
+
+        return users, refreshed_at
+
+    def invalidate_users(self):
+        """Forget the cached device user list, so the next get_users reads the device."""
+        self._users = None
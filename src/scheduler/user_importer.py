@@ -1,46 +1,36 @@
 import logging
-import schedule
 import time
-import os
-import uuid
-from datetime import datetime, timedelta
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
 from src.database.db_manager import DatabaseManager
-from src.api.api_client import APIClient
-from config.config import API_URL
-from src.database.models import APIUploadLog
-from src.device.attendance_processor import AttendanceProcessor
+from src.scheduler.scheduler_hub import default_hub
+from src.scheduler.services import Services
 
 logger = logging.getLogger(__name__)
 
+# How long the set of employee codes already on the device is trusted before re-reading it
+SAVED_USERS_CACHE_TTL = 3600  # seconds
+
+
 class UserImporter:
 
-    def __init__(self, db_manager=None):
-        self.db_manager = db_manager or DatabaseManager()
+    def __init__(self, db_manager=None, hub=None, services=None):
+        self.db_manager = db_manager or DatabaseManager.get_instance()
+        self.services = services or Services(self.db_manager)
         self.api_client = None
         self.processor = None
         self.running = False
+        self.hub = hub or default_hub
+        self._job_id = None
+        self._users_cache = None
+        self._users_cache_at = 0.0
+        self._last_imported_codes = None
+        self.added_users = []  # (user_id, code) of the users the last import wrote to the device
 
     def initialize(self):
-        config = self.db_manager.get_config()
-        if not config:
-            logger.error("No configuration found in database")
-            return False
-
-        self.api_client = APIClient(
-            api_url=API_URL,
-            company_id=config.company_id,
-            username=config.api_username,
-            password=config.api_password
-        )
-
-        self.processor = AttendanceProcessor(
-            ip=config.device_ip,
-            port=config.device_port
-        )
-
-        return self.api_client.authenticate() and self.processor.connect()
+        self.api_client = self.services.get_api_client()
+        self.processor = self.services.get_processor()
+        return self.api_client is not None and self.processor is not None
 
     def import_users(self):
         if not self.api_client or not self.processor:
@@ -48,10 +38,19 @@ class UserImporter:
                 logger.error("Failed to initialize API client or attendance processor")
                 return {'success': False, 'message': 'Initialization failed'}
 
-        employees = self.api_client.get_employees()
-        saved_users = {user.name for user in self.processor.get_users()}
+        self.added_users = []
 
-        imported = 0
+        if self._users_cache is None:
+            # Nothing known about the device yet, so its user list is needed anyway: read it while the API call runs
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="user-import") as executor:
+                saved_users_future = executor.submit(self._get_saved_users)
+                employees = self.api_client.get_employees()
+                if saved_users_future.result() is None:
+                    return self._device_read_failed()
+        else:
+            employees = self.api_client.get_employees()
+
+        candidates = {}
         for employee in employees:
             emp_id = employee.get('id')
             code = employee.get('code')
@@ -59,36 +58,74 @@ class UserImporter:
             if not emp_id or not code:
                 logger.warning(f"Skipping employee due to missing data: {employee}")
                 continue
-            if code in saved_users:
-                logger.warning(f"Skipping employee: {employee}, already saved")
-                continue
+            candidates[code] = emp_id
+
+        # Same employees as the last complete import and all known to be on the device: skip the device read
+        employee_codes = frozenset(candidates)
+        if (employee_codes == self._last_imported_codes
+                and self._users_cache is not None and employee_codes <= self._users_cache):
+            logger.info("Employee list unchanged since the last import, nothing to do")
+            return 0
 
-            try:
-                self.processor.set_user(emp_id=emp_id, code=code)
+        saved_users = self._get_saved_users()
+        if saved_users is None:
+            return self._device_read_failed()
+
+        # Only employees whose code isn't on the device yet need a device write
+        new_codes = candidates.keys() - saved_users
+        logger.info(f"{len(candidates) - len(new_codes)} employees already on device, {len(new_codes)} to import")
+
+        imported = 0
+        for code in new_codes:
+            if self.processor.set_user(emp_id=candidates[code], code=code):
+                # Remember it so a retry after a partial failure doesn't redo this user
+                saved_users.add(code)
+                self.added_users.append((str(candidates[code]), code))
                 imported += 1
-            except Exception as e:
-                logger.error(f"Error setting user: {code} - error: {e}")
+
+        if imported:
+            # The shared device user list no longer matches the device
+            self.services.invalidate_users()
+
+        if imported == len(new_codes):
+            self._last_imported_codes = employee_codes
 
         return imported
 
+    def _get_saved_users(self):
+        """
+        Return the employee codes already on the device, re-reading them once the cache expires.
+
+        Returns None, and caches nothing, if the device users could not be read.
+        """
+        if self._users_cache is None or time.monotonic() - self._users_cache_at >= SAVED_USERS_CACHE_TTL:
+            users = self.processor.get_users()
+            if users is None:
+                return None
+            self._users_cache = {user.name for user in users}
+            self._users_cache_at = time.monotonic()
+        return self._users_cache
+
+    @staticmethod
+    def _device_read_failed():
+        """Abort the import: without the device's users every employee would be enrolled again."""
+        logger.error("Could not read the users already on the device, import aborted")
+        return {'success': False, 'message': 'Could not read the users on the device'}
+
     def start_scheduler(self, interval_hours=12):
         """Start the User Importer scheduler."""
         if self.running:
             logger.warning("Scheduler is already running")
             return
 
-        # Schedule regular runs
-        schedule.every(interval_hours).hours.do(self.import_users)
-
+        self._job_id = self.hub.every(interval_hours * 3600, self.import_users)
         self.running = True
         logger.info(f"User Importer scheduled to run every {interval_hours} hours")
 
-        while self.running:
-            schedule.run_pending()
-            time.sleep(1)
-
     def stop_scheduler(self):
         """Stop the User Import scheduler."""
         self.running = False
-        schedule.clear()
-        logger.info("User Importer scheduler stopped")
+        if self._job_id is not None:
+            self.hub.cancel(self._job_id)
+            self._job_id = None
+        logger.info("User Importer scheduler stopped")
\ No newline at end of file
@@ -0,0 +1,33 @@
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# How often the Tk thread checks whether a background call has finished
+POLL_INTERVAL_MS = 100
+
+# Worker threads shared by every window; the work is device, API and database I/O
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ui-worker")
+
+
+def run_in_background(widget, target: Callable, on_done: Callable[[Future], None], *args) -> Future:
+    """
+    Run target(*args) on a worker thread, then call on_done(future) on the Tk thread.
+
+    target must not touch Tk. on_done gets the finished Future, so future.result() returns the
+    value or re-raises the exception of target. on_done is skipped if widget was destroyed meanwhile.
+    """
+    future = _executor.submit(target, *args)
+    widget.after(POLL_INTERVAL_MS, _poll, widget, future, on_done)
+    return future
+
+
+def _poll(widget, future: Future, on_done: Callable[[Future], None]):
+    """Reschedule until the future is done, then hand it to on_done."""
+    if not widget.winfo_exists():
+        return
+    if not future.done():
+        widget.after(POLL_INTERVAL_MS, _poll, widget, future, on_done)
+        return
+    on_done(future)
@@ -1,13 +1,14 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-import threading
-from typing import Optional, Union, Callable
+from concurrent.futures import Future
+from typing import Optional, Union, Callable, Tuple
 
 from src.database.db_manager import DatabaseManager
 from src.database.models import Config
 from src.device.attendance_processor import AttendanceProcessor
 from src.api.api_client import APIClient
+from src.ui.background import run_in_background
 from config.config import API_URL
 
 logger = logging.getLogger(__name__)
@@ -24,7 +25,7 @@ class ConfigInterface:
             db_manager: Database manager instance, creates a new one if None
             root: Tkinter root window, creates a new one if None
         """
-        self.db_manager = db_manager or DatabaseManager()
+        self.db_manager = db_manager or DatabaseManager.get_instance()
         self.root = tk.Toplevel(root)
 
         self.root.title("Attendance System Configuration")
@@ -32,16 +33,7 @@ class ConfigInterface:
         self.root.resizable(True, True)
 
         self.status_var = tk.StringVar()
-
-        # Initialize all UI-related variables
-        self.company_id_var = tk.StringVar()
-        self.api_username_var = tk.StringVar()
-        self.api_password_var = tk.StringVar()
-        self.device_ip_var = tk.StringVar()
-        self.device_port_var = tk.IntVar(value=4370)
-        self.collection_interval_var = tk.IntVar(value=60)
-        self.upload_interval_var = tk.IntVar(value=1)
-        self.user_import_interval_var = tk.IntVar(value=12)  # NEW
+        self.digits_vcmd = self.root.register(lambda value: value.isdigit() or value == "")
 
         # Create main layout frame
         self.main_frame = ttk.Frame(self.root, padding="20")
@@ -72,6 +64,18 @@ class ConfigInterface:
         self.upload_interval_var = self.create_entry("Upload Interval (hours):", 11, 1, is_int=True)
         self.user_import_interval_var = self.create_entry("User Importer (hours):", 12, 12, is_int=True)
 
+        # Config field name -> form variable, read together by get_config_dict
+        self.config_vars = {
+            'company_id': self.company_id_var,
+            'api_username': self.api_username_var,
+            'api_password': self.api_password_var,
+            'device_ip': self.device_ip_var,
+            'device_port': self.device_port_var,
+            'collection_interval': self.collection_interval_var,
+            'upload_interval': self.upload_interval_var,
+            'import_interval': self.user_import_interval_var,
+        }
+
         # Button Panel
         self.create_button_panel(14)
 
@@ -107,23 +111,18 @@ class ConfigInterface:
         default_value = int(default) if is_int else str(default)
         var = tk.IntVar(value=default_value) if is_int else tk.StringVar(value=default_value)
 
-        entry = ttk.Entry(self.main_frame, textvariable=var, width=40, show=show)
+        if is_int:
+            # Reject non-digit keystrokes as they are typed instead of failing later in IntVar.get()
+            entry = ttk.Spinbox(self.main_frame, textvariable=var, width=38, from_=0, to=65535,
+                                validate='key', validatecommand=(self.digits_vcmd, '%P'))
+        else:
+            entry = ttk.Entry(self.main_frame, textvariable=var, width=40, show=show)
         entry.grid(column=1, row=row, sticky=tk.W, pady=5)
-        var.set(default_value)
 
         return var
 
     def get_config_dict(self) -> Config:
-        return Config(
-            company_id=self.company_id_var.get(),
-            api_username=self.api_username_var.get(),
-            api_password=self.api_password_var.get(),
-            device_ip=self.device_ip_var.get(),
-            device_port=int(self.device_port_var.get()),
-            collection_interval=int(self.collection_interval_var.get()),
-            upload_interval=int(self.upload_interval_var.get()),
-            import_interval=int(self.user_import_interval_var.get())  # NEW
-        )
+        return Config(**{name: var.get() for name, var in self.config_vars.items()})
 
     def load_config(self):
         try:
@@ -133,8 +132,6 @@ class ConfigInterface:
                 logger.info("No configuration found in database.")
                 return
 
-            print("Loaded config:", config.__dict__)
-
             self.company_id_var.set(config.company_id)
             self.api_username_var.set(config.api_username)
             self.api_password_var.set(config.api_password)
@@ -145,8 +142,6 @@ class ConfigInterface:
             self.upload_interval_var.set(int(config.upload_interval) if config.upload_interval is not None else 1)
             self.user_import_interval_var.set(int(config.import_interval) if config.import_interval is not None else 12)
 
-            self.root.update_idletasks()
-            self.root.update()
             self.status_var.set("Configuration loaded successfully.")
             logger.info("Configuration loaded from database.")
         except Exception as e:
@@ -170,53 +165,69 @@ class ConfigInterface:
             self.handle_error("Error saving configuration", e)
 
     def test_device_connection(self):
+        try:
+            # Read the Tk variables here on the main thread; the worker only gets plain values
+            ip = self.device_ip_var.get()
+            port = self.device_port_var.get()
+        except tk.TclError as e:
+            self.handle_error("Invalid device settings", e)
+            return
+
         self.status_var.set("Testing device connection...")
-        self.run_async(self.device_connection_logic)
+        self.run_async(self.device_connection_logic, ip, port)
 
     def test_api_connection(self):
+        company_id = self.company_id_var.get()
+        username = self.api_username_var.get()
+        password = self.api_password_var.get()
+
         self.status_var.set("Testing API connection...")
-        self.run_async(self.api_connection_logic)
+        self.run_async(self.api_connection_logic, company_id, username, password)
 
-    def device_connection_logic(self):
+    def device_connection_logic(self, ip: str, port: int) -> Tuple[bool, str]:
         try:
-            processor = AttendanceProcessor(
-                ip=self.device_ip_var.get(),
-                port=self.device_port_var.get()
-            )
+            processor = AttendanceProcessor(ip=ip, port=port)
 
             if not processor.connect():
-                self.show_error(
-                    f"Could not connect to device at {self.device_ip_var.get()}:{self.device_port_var.get()}"
-                )
-                return
+                return False, f"Could not connect to device at {ip}:{port}"
 
-            users = processor.get_users() or []
-            count = len(users)
+            count = processor.get_user_count()
             processor.disconnect()
-            self.show_success(f"Device connected. Found {count} users.")
+            if count is None:
+                return False, f"Connected to device at {ip}:{port}, but could not read its users"
+            return True, f"Device connected. Found {count} users."
 
         except Exception as e:
-            self.handle_error("Error testing device connection", e)
+            logger.error(f"Error testing device connection: {e}")
+            return False, f"Error testing device connection: {e}"
 
-    def api_connection_logic(self):
+    def api_connection_logic(self, company_id: str, username: str, password: str) -> Tuple[bool, str]:
         try:
             api_client = APIClient(
                 api_url=API_URL,
-                company_id=self.company_id_var.get(),
-                username=self.api_username_var.get(),
-                password=self.api_password_var.get()
+                company_id=company_id,
+                username=username,
+                password=password
             )
 
             if api_client.authenticate():
-                self.show_success(f"Authenticated with API at {API_URL}")
-            else:
-                self.show_error(f"Failed to authenticate with API at {API_URL}")
+                return True, f"Authenticated with API at {API_URL}"
+            return False, f"Failed to authenticate with API at {API_URL}"
 
         except Exception as e:
-            self.handle_error("Error testing API connection", e)
-
-    def run_async(self, target: Callable):
-        threading.Thread(target=target, daemon=True).start()
+            logger.error(f"Error testing API connection: {e}")
+            return False, f"Error testing API connection: {e}"
+
+    def run_async(self, target: Callable[..., Tuple[bool, str]], *args):
+        """Run a connection test in the background and report its (ok, message) result on the Tk thread."""
+        run_in_background(self.root, target, self.deliver_result, *args)
+
+    def deliver_result(self, future: Future):
+        ok, message = future.result()
+        if ok:
+            self.show_success(message)
+        else:
+            self.show_error(message)
 
     def show_validation_error(self, message: str):
         messagebox.showerror("Validation Error", message)
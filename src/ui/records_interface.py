@@ -1,28 +1,61 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, messagebox
 import logging
-from typing import Optional, List
+from concurrent.futures import Future
+from operator import attrgetter
+from typing import Optional, List, Dict
 
 from src.database.db_manager import DatabaseManager
 from src.database.models import AttendanceRecord
 from src.scheduler.api_uploader import APIUploader
+from src.scheduler.attendance_collector import AttendanceCollector
+from src.scheduler.services import Services
+from src.ui.background import run_in_background
+from src.ui import treeview_batch
 
 logger = logging.getLogger(__name__)
 
+# Records fetched per query; further pages load as the list is scrolled to the end
+PAGE_SIZE = 200
+
+# Filter choices mapped to the processed value they select (None for all records)
+PROCESSED_FILTERS = {"all": None, "processed": 1, "unprocessed": 0}
+
+# Text of the Processed column, indexed by the record's processed flag
+PROCESSED_LABELS = ("No", "Yes")
+
+# Sort key per Treeview column, matching the database order (column, then id)
+SORT_KEYS = {column: attrgetter(column, 'id') for column in ("id", "username", "timestamp", "punch_type", "processed")}
+
+# Delay before a filter change reloads the records, so a burst of clicks reloads once
+FILTER_DEBOUNCE_MS = 150
+# Longer delay while typing in the search box, so the records reload once the user pauses
+SEARCH_DEBOUNCE_MS = 250
+
 
 class RecordsInterface:
     """
     A GUI interface for displaying and managing attendance records from the database.
     """
 
-    def __init__(self, root: Optional[tk.Tk], users=None, db_manager: Optional[DatabaseManager] = None):
+    def __init__(self, root: Optional[tk.Tk], users=None, db_manager: Optional[DatabaseManager] = None,
+                 collector: Optional[AttendanceCollector] = None, uploader: Optional[APIUploader] = None,
+                 services: Optional[Services] = None):
         """
         Initialize the RecordsInterface.
         """
-        self.db_manager = db_manager or DatabaseManager()
-        self.uploader = APIUploader(self.db_manager)
+        self.db_manager = db_manager or DatabaseManager.get_instance()
+        self.uploader = uploader  # created on first synchronize if not shared by the caller
+        self.collector = collector or AttendanceCollector(self.db_manager)
+        self.services = services or self.collector.services
         self.root = tk.Toplevel(root)
-        self.users = users
+        self.users = None  # device user objects, handed to the collector
+        self.users_by_name = {}  # user ID by employee code, for records added by hand
+        self.user_load_callbacks = None  # callbacks waiting for the device user read in progress, if any
+        if users:
+            self.set_users(users)
+        else:
+            self.load_known_users()
 
         self.root.title("Attendance Records")
         self.root.geometry("1100x800")
@@ -30,11 +63,17 @@ class RecordsInterface:
 
         self.status_var = tk.StringVar()
         self.records: List[AttendanceRecord] = []
+        self.records_by_id: Dict[str, AttendanceRecord] = {}  # loaded records keyed by the id shown in the tree
+        self.total_records = 0
+        self.query = {}  # filter, sort and search of the loaded records, reused for the next pages
+        self.page_pending = False
+        self.pending_filter = None  # after() id of a scheduled run_filter
 
         # Filter variables
         self.filter_var = tk.StringVar(value="all")  # Default to showing all records
         self.sort_var = tk.StringVar(value="timestamp")  # Default sorting
         self.search_var = tk.StringVar()  # For search functionality
+        self.search_var.trace_add("write", lambda *args: self.apply_filter(SEARCH_DEBOUNCE_MS))
 
         # Create main layout frames
         self.create_layout()
@@ -43,6 +82,49 @@ class RecordsInterface:
         self.load_records()
         self.display_records()
 
+    def set_users(self, users):
+        """Use a user list read from the device."""
+        self.users = users
+        self.users_by_name = {user.name: user.user_id for user in users}
+
+    def load_known_users(self):
+        """Index the users known without a device read: the shared recent read, else the stored device_users list."""
+        cached = self.services.get_cached_users()
+        if cached:
+            self.set_users(cached[0])
+            return
+
+        config = self.db_manager.get_config()
+        if config:
+            stored_users, _ = self.db_manager.get_device_users(config.device_ip)
+            self.users_by_name = {user['name']: user['id'] for user in stored_users}
+
+    def load_users(self, on_loaded):
+        """Read the device users in the background, then call on_loaded(); requests made meanwhile share the read."""
+        if self.user_load_callbacks is not None:
+            if on_loaded not in self.user_load_callbacks:
+                self.user_load_callbacks.append(on_loaded)
+            return
+
+        self.user_load_callbacks = [on_loaded]
+        self.status_var.set("Loading device users...")
+        run_in_background(self.root, self.services.get_users, self.on_users_loaded)
+
+    def on_users_loaded(self, future: Future):
+        """Index the users read from the device and run the callbacks waiting for them."""
+        callbacks, self.user_load_callbacks = self.user_load_callbacks, None
+
+        try:
+            users, _ = future.result()
+        except Exception as e:
+            self.handle_error("Error loading users from the device", e)
+            return
+
+        self.set_users(users)
+        self.status_var.set(f"Loaded {len(users)} device users.")
+        for callback in callbacks:
+            callback()
+
     def create_layout(self):
         """Create the main application layout with distinct sections"""
         # Main container
@@ -72,6 +154,7 @@ class RecordsInterface:
         # Setup individual sections
         self.setup_header()
         self.setup_control_panel()
+        self.setup_records_tree()
         self.setup_status_bar()
         self.setup_action_buttons()
 
@@ -107,13 +190,12 @@ class RecordsInterface:
         filter_frame = ttk.Frame(right_frame)
         filter_frame.pack(fill=tk.X, pady=5)
 
-        # Filter radio buttons
+        # Processed filter
         ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=(0, 10))
-        ttk.Radiobutton(filter_frame, text="All", variable=self.filter_var, value="all").pack(side=tk.LEFT, padx=5)
-        ttk.Radiobutton(filter_frame, text="Processed", variable=self.filter_var, value="processed").pack(side=tk.LEFT,
-                                                                                                          padx=5)
-        ttk.Radiobutton(filter_frame, text="Unprocessed", variable=self.filter_var, value="unprocessed").pack(
-            side=tk.LEFT, padx=5)
+        filter_combo = ttk.Combobox(filter_frame, textvariable=self.filter_var, width=15, state="readonly",
+                                    values=list(PROCESSED_FILTERS))
+        filter_combo.pack(side=tk.LEFT, padx=5)
+        filter_combo.bind("<<ComboboxSelected>>", lambda event: self.apply_filter())
 
         # Sort options
         sort_frame = ttk.Frame(right_frame)
@@ -131,6 +213,9 @@ class RecordsInterface:
         status_label = ttk.Label(self.status_frame, textvariable=self.status_var)
         status_label.pack(side=tk.LEFT, padx=5, pady=5)
 
+        # Shown only while a synchronization is running
+        self.sync_progress = ttk.Progressbar(self.status_frame, mode="indeterminate", length=200)
+
     def setup_action_buttons(self):
         """Setup the action buttons section"""
         # Left side - CRUD operations
@@ -141,12 +226,20 @@ class RecordsInterface:
         ttk.Button(crud_frame, text="Update Record", command=self.update_record).pack(side=tk.LEFT, padx=5, pady=5)
         ttk.Button(crud_frame, text="Delete Record", command=self.delete_record).pack(side=tk.LEFT, padx=5, pady=5)
 
+        # Loads the next page without scrolling to the end of the list
+        self.load_more_button = ttk.Button(crud_frame, text="Load More", command=self.load_next_page,
+                                           state=tk.DISABLED)
+        self.load_more_button.pack(side=tk.LEFT, padx=(20, 5), pady=5)
+
         # Right side - Synchronize button
         sync_frame = ttk.Frame(self.action_frame)
         sync_frame.pack(side=tk.RIGHT, fill=tk.X)
 
-        sync_btn = ttk.Button(sync_frame, text="SYNCHRONIZE", command=self.synchronize_records)
-        sync_btn.pack(side=tk.RIGHT, padx=5, pady=5)
+        self.sync_button = ttk.Button(sync_frame, text="SYNCHRONIZE", command=self.synchronize_records)
+        self.sync_button.pack(side=tk.RIGHT, padx=5, pady=5)
+
+        self.refresh_button = ttk.Button(sync_frame, text="Refresh Now", command=self.refresh_from_device)
+        self.refresh_button.pack(side=tk.RIGHT, padx=5, pady=5)
 
     def show(self):
         """Display the records window as a modal dialog."""
@@ -159,55 +252,83 @@ class RecordsInterface:
 
     def load_records(self):
         """
-        Load attendance records from the database based on current filter.
+        Load the first page of attendance records from the database based on current filter.
         """
         try:
             filter_value = self.filter_var.get()
             order_by = self.sort_var.get()
             search_term = self.search_var.get()
 
-            # Convert filter value to the appropriate parameter
-            filter_processed = None  # Default to all records
-            if filter_value == "processed":
-                filter_processed = 1
-            elif filter_value == "unprocessed":
-                filter_processed = 0
+            filter_processed = PROCESSED_FILTERS[filter_value]
 
-            records = self.db_manager.get_attendance_records(filter_processed=filter_processed, order_by=order_by)
+            self.query = {'filter_processed': filter_processed, 'order_by': order_by, 'search': search_term}
+            self.total_records = self.db_manager.count_attendance_records(
+                filter_processed=filter_processed, search=search_term
+            )
+            self.records = self.db_manager.get_attendance_records(**self.query, limit=PAGE_SIZE)
+            self.records_by_id = {str(record.id): record for record in self.records}
 
-            # Apply search filter if provided
-            if search_term:
-                records = [r for r in records if search_term.lower() in str(r.username).lower() or
-                           search_term.lower() in str(r.timestamp).lower()]
-
-            if not records:
+            self.update_record_count()
+            if not self.records:
                 logger.info(f"No {filter_value} attendance records found in the database.")
-                self.records = []
-                self.record_count_var.set("0 records found")
                 return
 
-            self.records = records  # Expecting a list of AttendanceRecord instances
-            self.record_count_var.set(f"{len(records)} records found")
-            logger.info(f"Loaded {len(records)} {filter_value} attendance records successfully.")
+            logger.info(f"Loaded {len(self.records)} of {self.total_records} {filter_value} attendance records.")
 
         except Exception as e:
             self.handle_error("Error loading attendance records", e)
 
-    def display_records(self):
-        """
-        Display the attendance records in the main frame.
-        """
-        # Clear previous records display
-        for widget in self.records_frame.winfo_children():
-            widget.destroy()
+    def load_next_page(self):
+        """Append the next page of records to the list (scrolled to the end or Load More clicked)."""
+        self.page_pending = False
+        if len(self.records) >= self.total_records:
+            return
+
+        try:
+            records = self.db_manager.get_attendance_records(**self.query, limit=PAGE_SIZE,
+                                                             offset=len(self.records))
+        except Exception as e:
+            self.handle_error("Error loading attendance records", e)
+            return
+
+        if not records:
+            # Rows were deleted since the count was taken
+            self.total_records = len(self.records)
+            self.update_record_count()
+            return
 
+        self.records.extend(records)
+        self.records_by_id.update((str(record.id), record) for record in records)
+        self.insert_rows(records)
+        self.update_record_count()
+
+    def update_record_count(self):
+        """Show how many of the matching records are loaded and enable Load More while some are not."""
+        if not self.total_records:
+            self.record_count_var.set("0 records found")
+        elif len(self.records) < self.total_records:
+            self.record_count_var.set(f"Showing {len(self.records)} of {self.total_records} records")
+        else:
+            self.record_count_var.set(f"{self.total_records} records found")
+
+        self.load_more_button.config(state=tk.NORMAL if len(self.records) < self.total_records else tk.DISABLED)
+
+    def on_tree_scroll(self, first, last):
+        """Update the scrollbar and request the next page once the last loaded row is visible."""
+        self.v_scrollbar.set(first, last)
+        if float(last) >= 1.0 and not self.page_pending and len(self.records) < self.total_records:
+            self.page_pending = True
+            self.root.after_idle(self.load_next_page)
+
+    def setup_records_tree(self):
+        """Setup the records Treeview, its scrollbars and context menu"""
         # Create a frame for the treeview and scrollbars
         tree_container = ttk.Frame(self.records_frame)
         tree_container.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
         # Create the Treeview
         columns = ("id", "username", "timestamp", "punch_type", "processed")
-        self.tree = ttk.Treeview(tree_container, columns=columns, show="headings", selectmode="browse")
+        self.tree = ttk.Treeview(tree_container, columns=columns, show="headings", selectmode="extended")
 
         # Define headings
         self.tree.heading("id", text="ID", command=lambda: self.sort_treeview("id"))
@@ -224,29 +345,54 @@ class RecordsInterface:
         self.tree.column("processed", width=100, anchor=tk.CENTER)
 
         # Add scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL, command=self.tree.yview)
-        v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.v_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL, command=self.tree.yview)
+        self.v_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
         h_scrollbar = ttk.Scrollbar(tree_container, orient=tk.HORIZONTAL, command=self.tree.xview)
         h_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
 
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(yscrollcommand=self.on_tree_scroll, xscrollcommand=h_scrollbar.set)
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-        # Insert records into the Treeview
-        for record in self.records:
-            processed_text = "Yes" if record.processed == 1 else "No"
-            self.tree.insert("", tk.END, values=(
-                record.id,
-                record.username,
-                record.timestamp if record.timestamp else "N/A",
-                record.punch_type,
-                processed_text
-            ))
+        treeview_batch.define_bulk_insert(self.tree)
 
         # Add right-click menu
         self.create_context_menu()
 
+    def display_records(self):
+        """
+        Replace the rows of the records Treeview with the loaded records.
+        """
+        # Unmap the tree while it is refilled so Tk lays it out once
+        self.tree.pack_forget()
+        self.tree.delete(*self.tree.get_children())
+        self.insert_rows(self.records)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    @staticmethod
+    def row_values(record):
+        """Values of a record's Treeview row, in column order."""
+        return (record.id, record.username, record.timestamp or "N/A", record.punch_type,
+                PROCESSED_LABELS[bool(record.processed)])
+
+    def remove_rows(self, records):
+        """Drop records from the Treeview and the loaded pages after they were deleted or filtered out."""
+        self.tree.delete(*(str(record.id) for record in records))
+        for record in records:
+            self.records.remove(record)
+            del self.records_by_id[str(record.id)]
+        self.total_records -= len(records)
+        self.update_record_count()
+
+    def matches_filter(self, record):
+        """Whether a record still belongs to the loaded list under its processed filter."""
+        filter_processed = self.query.get('filter_processed')
+        return filter_processed is None or filter_processed == int(record.processed)
+
+    def insert_rows(self, records):
+        """Append records to the end of the Treeview."""
+        rows = tuple(self.row_values(record) for record in records)
+        treeview_batch.insert_rows(self.tree, rows, use_ids=True)
+
     def create_context_menu(self):
         """Create a right-click context menu for the treeview"""
         self.context_menu = tk.Menu(self.tree, tearoff=0)
@@ -263,20 +409,21 @@ class RecordsInterface:
         # Select row under mouse
         iid = self.tree.identify_row(event.y)
         if iid:
-            self.tree.selection_set(iid)
+            # Keep a multi-row selection when right-clicking one of its rows
+            if iid not in self.tree.selection():
+                self.tree.selection_set(iid)
             self.context_menu.post(event.x_root, event.y_root)
 
     def toggle_processed_status(self, processed):
         """Toggle the processed status of a record"""
         selected_item = self.tree.selection()
-        if not selected_item:
-            self.show_error("Please select a record.")
+        if len(selected_item) != 1:
+            self.show_error("Please select a single record.")
             return
 
-        record_values = self.tree.item(selected_item, "values")
-        record_id = record_values[0]
-
-        record = next((r for r in self.records if str(r.id) == str(record_id)), None)
+        # Item ids are the record ids
+        record_id = selected_item[0]
+        record = self.records_by_id.get(record_id)
         if not record:
             self.show_error("Record not found.")
             return
@@ -284,20 +431,49 @@ class RecordsInterface:
         try:
             record.processed = processed
             self.db_manager.update_attendance_record(record)
+
+            # Edit the row in place instead of reloading the list
+            if self.matches_filter(record):
+                self.tree.set(record_id, "processed", PROCESSED_LABELS[bool(processed)])
+            else:
+                self.remove_rows([record])
+
             status = "processed" if processed else "unprocessed"
             self.show_success(f"Record marked as {status} successfully.")
-            self.load_records()
-            self.display_records()
         except Exception as e:
             self.handle_error(f"Error updating record", e)
 
     def sort_treeview(self, column):
         """Set the sort column and refresh the display"""
         self.sort_var.set(column)
+
+        # With every matching record loaded, reorder them in memory instead of querying again
+        if self.query and len(self.records) >= self.total_records:
+            try:
+                self.records.sort(key=SORT_KEYS[column])
+            except TypeError:
+                # Mixed value types in the column (e.g. edited punch types); let SQLite order them
+                pass
+            else:
+                self.query['order_by'] = column
+                self.display_records()
+                return
+
         self.apply_filter()
 
-    def apply_filter(self):
-        """Apply the selected filter and sort options"""
+    def apply_filter(self, delay_ms: int = FILTER_DEBOUNCE_MS):
+        """Apply the selected filter and sort options, coalescing requests made in quick succession"""
+        if self.pending_filter is not None:
+            self.root.after_cancel(self.pending_filter)
+        self.pending_filter = self.root.after(delay_ms, self.run_filter)
+
+    def request_refresh(self):
+        """Reload the records on the next event-loop pass; requests made before then share one reload"""
+        self.apply_filter(delay_ms=0)
+
+    def run_filter(self):
+        """Reload and display the records for the current filter and sort options"""
+        self.pending_filter = None
         self.load_records()
         self.display_records()
 
@@ -355,19 +531,31 @@ class RecordsInterface:
                     self.show_error("Username and timestamp are required fields.")
                     return
 
+                user_id = self.users_by_name.get(record_data['username'])
+                if user_id is None and self.users is None:
+                    # Only the stored user list was checked: read the device users, then submit again
+                    self.load_users(submit_when_loaded)
+                    return
+                if user_id is None:
+                    self.show_error(f"Unknown user: {record_data['username']}")
+                    return
+
                 # Optionally convert types as needed
-                users_map = {user.name: user.user_id for user in self.users} if self.users else {}
-                record_data['user_id'] = users_map.get(record_data['username'], "")
+                record_data['user_id'] = user_id
                 record_data['processed'] = bool(int(record_data.get('processed', 0)))
 
                 self.db_manager.save_attendance_record(record_data)
                 self.show_success("Record added successfully.")
                 form.destroy()
-                self.load_records()
-                self.display_records()
+                self.request_refresh()
             except Exception as e:
                 self.handle_error("Error adding record", e)
 
+        def submit_when_loaded():
+            # The form may have been cancelled while the users were loading
+            if form.winfo_exists():
+                submit()
+
         # Button frame at the bottom
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill=tk.X, pady=10)
@@ -380,16 +568,13 @@ class RecordsInterface:
         Update the selected attendance record.
         """
         selected_item = self.tree.selection()
-        if not selected_item:
-            self.show_error("Please select a record to update.")
+        if len(selected_item) != 1:
+            self.show_error("Please select a single record to update.")
             return
 
-        # Get the selected record's values
-        record_values = self.tree.item(selected_item, "values")
-        record_id = record_values[0]
-
-        # Retrieve the full record
-        record = next((r for r in self.records if str(r.id) == str(record_id)), None)
+        # Item ids are the record ids
+        record_id = selected_item[0]
+        record = self.records_by_id.get(record_id)
         if not record:
             self.show_error("Record not found.")
             return
@@ -454,10 +639,15 @@ class RecordsInterface:
 
                 # Call update in the database
                 self.db_manager.update_attendance_record(record)
+
+                # Edit the row in place; its sort position is refreshed on the next reload
+                if self.matches_filter(record):
+                    self.tree.item(record_id, values=self.row_values(record))
+                else:
+                    self.remove_rows([record])
+
                 self.show_success("Record updated successfully.")
                 form.destroy()
-                self.load_records()
-                self.display_records()
             except Exception as e:
                 self.handle_error("Error updating record", e)
 
@@ -470,56 +660,98 @@ class RecordsInterface:
 
     def delete_record(self):
         """
-        Delete the selected attendance record.
+        Delete the selected attendance records.
         """
-        selected_item = self.tree.selection()
-        if not selected_item:
+        selected_items = self.tree.selection()
+        if not selected_items:
             self.show_error("Please select a record to delete.")
             return
 
         # Confirm deletion
-        if not messagebox.askyesno("Confirm Delete",
-                                   "Are you sure you want to delete the selected record?",
-                                   parent=self.root):
+        message = ("Are you sure you want to delete the selected record?" if len(selected_items) == 1
+                   else f"Are you sure you want to delete the {len(selected_items)} selected records?")
+        if not messagebox.askyesno("Confirm Delete", message, parent=self.root):
             return
 
-        record_values = self.tree.item(selected_item, "values")
-        record_id = record_values[0]
-
-        record = next((r for r in self.records if str(r.id) == str(record_id)), None)
-        if not record:
+        # Item ids are the record ids
+        records = [self.records_by_id.get(record_id) for record_id in selected_items]
+        if not all(records):
             self.show_error("Record not found.")
             return
 
         try:
-            self.db_manager.delete_attendance_record(record)
-            self.show_success("Record deleted successfully.")
-            self.load_records()
-            self.display_records()
+            self.db_manager.delete_attendance_records([record.id for record in records])
+            self.remove_rows(records)
+            self.show_success("Records deleted successfully." if len(records) > 1 else "Record deleted successfully.")
         except Exception as e:
             self.handle_error("Error deleting record", e)
 
-    def synchronize_records(self):
+    def refresh_from_device(self):
         """
-        Call the uploader to synchronize attendance records.
+        Collect new attendance from the device in the background, then reload the records.
         """
+        self.refresh_button.config(state=tk.DISABLED)
+        self.status_var.set("Collecting attendance from device...")
+
+        run_in_background(self.root, self.collector.collect_attendance, self.on_collection_done, self.users)
+
+    def on_collection_done(self, future: Future):
+        """
+        Refresh the display once the background collection has finished.
+        """
+        self.refresh_button.config(state=tk.NORMAL)
+
         try:
-            # Show synchronizing status
-            self.status_var.set("Synchronizing records...")
-            self.root.update()
+            collected = future.result()
+        except Exception as e:
+            self.handle_error("Error collecting attendance", e)
+            return
+
+        if not collected:
+            self.status_var.set("Attendance not collected: device unavailable or a collection is already running.")
+            return
+
+        self.request_refresh()
+        self.status_var.set("Attendance collected from device.")
+
+    def synchronize_records(self):
+        """
+        Upload the unprocessed attendance records in the background, then reload the records.
+        """
+        if self.uploader is None:
+            self.uploader = APIUploader(self.db_manager)
+
+        self.sync_button.config(state=tk.DISABLED)
+        self.status_var.set("Synchronizing records...")
+        self.sync_progress.pack(side=tk.RIGHT, padx=5, pady=5)
+        self.sync_progress.start(10)
 
-            # Perform synchronization
-            self.uploader.upload_data()
+        run_in_background(self.root, self.uploader.upload_data, self.on_sync_done)
 
-            # Refresh display
-            self.load_records()
-            self.display_records()
+    def on_sync_done(self, future: Future):
+        """
+        Refresh the display once the background upload has finished.
+        """
+        self.sync_progress.stop()
+        self.sync_progress.pack_forget()
+        self.sync_button.config(state=tk.NORMAL)
 
-            # Update status
-            self.status_var.set("Records synchronized successfully.")
-            logger.info("Records synchronized successfully.")
+        try:
+            uploaded = future.result()
         except Exception as e:
             self.handle_error("Error synchronizing records", e)
+            return
+
+        if not uploaded:
+            self.status_var.set("Records not synchronized: API unavailable or an upload is already in progress.")
+            return
+
+        # Refresh display
+        self.request_refresh()
+
+        # Update status
+        self.status_var.set("Records synchronized successfully.")
+        logger.info("Records synchronized successfully.")
 
     def show_error(self, message: str):
         """
@@ -0,0 +1,27 @@
+from tkinter import ttk
+
+# Tcl procedure that appends a list of rows to a Treeview in a single call.
+# With use_ids, each row's first value is its item id and rows whose item already exists are skipped.
+BULK_INSERT_PROC = "::treeview_bulk_insert"
+BULK_INSERT_SCRIPT = f"""
+proc {BULK_INSERT_PROC} {{tree rows use_ids}} {{
+    foreach row $rows {{
+        if {{!$use_ids}} {{
+            $tree insert {{}} end -values $row
+        }} elseif {{![$tree exists [lindex $row 0]]}} {{
+            $tree insert {{}} end -id [lindex $row 0] -values $row
+        }}
+    }}
+}}
+"""
+
+
+def define_bulk_insert(tree: ttk.Treeview):
+    """Define the bulk insert procedure in the tree's Tcl interpreter; call once before insert_rows."""
+    tree.tk.eval(BULK_INSERT_SCRIPT)
+
+
+def insert_rows(tree: ttk.Treeview, rows: tuple, use_ids: bool = False):
+    """Append rows (tuples of column values) to the end of tree with one Tcl call."""
+    # tkinter converts the nested tuples to properly quoted Tcl lists
+    tree.tk.call(BULK_INSERT_PROC, str(tree), rows, int(use_ids))
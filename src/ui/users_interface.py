@@ -1,28 +1,44 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
+from concurrent.futures import Future
+from datetime import datetime
+from types import SimpleNamespace
 from typing import Optional
 
 from src.database.db_manager import DatabaseManager
-from src.device.attendance_processor import AttendanceProcessor
+from src.scheduler.services import REFRESHED_AT_FORMAT, Services
 from src.scheduler.user_importer import UserImporter
+from src.ui.background import run_in_background
+from src.ui.treeview_batch import define_bulk_insert, insert_rows
 
 logger = logging.getLogger(__name__)
 
+# Users inserted into the Treeview at a time; more are added as the view scrolls to the end
+USERS_PAGE_SIZE = 200
 
 class UsersInterface:
-    def __init__(self, root: Optional[tk.Tk], users=None, db_manager: Optional[DatabaseManager] = None):
-        self.db_manager = db_manager or DatabaseManager()
-        self.processor = None
-        self.user_importer = UserImporter(self.db_manager)
+    def __init__(self, root: Optional[tk.Tk], users=None, db_manager: Optional[DatabaseManager] = None,
+                 services: Optional[Services] = None):
+        self.db_manager = db_manager or DatabaseManager.get_instance()
+        # Device connection shared with the schedulers and the other windows
+        self.services = services or Services(self.db_manager)
+        self.user_importer = None  # created on the first import
         self.root = tk.Toplevel(root)
         self.users = users
+        self.user_rows = ()  # Treeview values of every user, in display order
+        self.rendered_rows = 0  # How many of user_rows are in the Treeview
+        self.page_pending = False
+        self.users_by_id = {}  # users keyed by the user ID shown in the tree
+        self.selected_user = None  # user last double-clicked, for the future detail view
+        self.showing_stored_users = False  # the list shown is the stored one, not yet confirmed by the device
 
         # Configure window properties
         self.root.title("User Management")
         self.root.geometry("800x600")
         self.root.minsize(600, 400)
         self.root.resizable(True, True)
+        self.root.protocol("WM_DELETE_WINDOW", self.hide)
 
         # Status variable for displaying messages
         self.status_var = tk.StringVar()
@@ -30,12 +46,11 @@ class UsersInterface:
         # Create and configure the main layout
         self.setup_ui()
 
-        # Load data if not provided
+        # Load data if not provided, otherwise populate the user list right away
         if not self.users:
             self.load_users()
-
-        # Populate the user list
-        self.refresh_user_list()
+        else:
+            self.refresh_user_list()
 
     def setup_ui(self):
         """Create and configure all UI elements"""
@@ -76,12 +91,16 @@ class UsersInterface:
         self.import_button.pack(side=tk.RIGHT, padx=5)
 
         # Refresh button
-        refresh_button = ttk.Button(
+        self.refresh_button = ttk.Button(
             action_frame,
             text="Refresh List",
-            command=self.refresh_data
+            command=lambda: self.refresh_data(force_refresh=True)
         )
-        refresh_button.pack(side=tk.RIGHT, padx=5)
+        self.refresh_button.pack(side=tk.RIGHT, padx=5)
+
+        # When the displayed list was read from the device
+        self.refreshed_var = tk.StringVar()
+        ttk.Label(action_frame, textvariable=self.refreshed_var).pack(side=tk.RIGHT, padx=5)
 
     def create_user_list_section(self):
         """Create the user list section with a frame and treeview"""
@@ -110,9 +129,9 @@ class UsersInterface:
         self.tree.column("id", width=100, anchor=tk.CENTER)
         self.tree.column("name", width=300, anchor=tk.W)
 
-        # Add vertical scrollbar
-        vsb = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=vsb.set)
+        # Add vertical scrollbar; scrolling to the end inserts the next page of users
+        self.v_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=self.on_tree_scroll)
 
         # Add horizontal scrollbar
         hsb = ttk.Scrollbar(tree_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
@@ -120,7 +139,7 @@ class UsersInterface:
 
         # Position scrollbars and treeview using grid
         self.tree.grid(row=0, column=0, sticky="nsew")
-        vsb.grid(row=0, column=1, sticky="ns")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
 
         # Configure grid weights
@@ -130,6 +149,22 @@ class UsersInterface:
         # Double-click event (optional for future user detail view)
         self.tree.bind("<Double-1>", self.on_user_double_click)
 
+        define_bulk_insert(self.tree)
+
+    def on_tree_scroll(self, first, last):
+        """Update the scrollbar and insert the next page of users once the last inserted row is visible."""
+        self.v_scrollbar.set(first, last)
+        if float(last) >= 1.0 and not self.page_pending and self.rendered_rows < len(self.user_rows):
+            self.page_pending = True
+            self.root.after_idle(self.insert_next_page)
+
+    def insert_next_page(self):
+        """Append the next USERS_PAGE_SIZE users to the Treeview."""
+        self.page_pending = False
+        rows = self.user_rows[self.rendered_rows:self.rendered_rows + USERS_PAGE_SIZE]
+        insert_rows(self.tree, rows)
+        self.rendered_rows += len(rows)
+
     def create_status_bar(self):
         """Create status bar at the bottom of the window"""
         status_frame = ttk.Frame(self.main_frame)
@@ -147,104 +182,183 @@ class UsersInterface:
         self.root.grab_set()  # Make this window modal
         self.root.focus_set()  # Set keyboard focus
 
-    def initialize(self):
-        """Initialize the attendance processor with config from the database."""
-        # Set status message
-        self.status_var.set("Initializing connection...")
-        self.root.update()  # Force UI update
+    def hide(self):
+        """Hide the window instead of destroying it, so the next open reuses its widgets"""
+        self.root.grab_release()
+        self.root.withdraw()
+
+    def reopen(self):
+        """Show the hidden window again and refresh the list unless a load is still running"""
+        self.root.deiconify()
+        # Not through show(): the opener may have replaced it on this instance
+        self.root.lift()
+        self.root.grab_set()
+        self.root.focus_set()
+        # Reuses the cached device list while it is recent, so this only reads the device once it expired
+        if self.refresh_button.instate(["!disabled"]):
+            self.refresh_data()
+
+    def load_users(self, force_refresh: bool = False):
+        """Show the device users, reading them in the background unless a recent read of the device is cached"""
+        cached = None if force_refresh else self.services.get_cached_users()
+        if cached:
+            self.users, refreshed_at = cached
+            self.refresh_user_list()
+            self.set_refreshed_at(refreshed_at)
+            return
 
         config = self.db_manager.get_config()
-        if not config:
-            logger.error("No configuration found in database")
-            self.status_var.set("Error: No configuration found")
-            return False
-
-        self.processor = AttendanceProcessor(
-            ip=config.device_ip,
-            port=config.device_port
+        if not self.users and config:
+            # Show the list stored by the last device read right away; the device read below replaces it
+            stored_users, refreshed_at = self.db_manager.get_device_users(config.device_ip)
+            if stored_users:
+                self.users = stored_users
+                self.showing_stored_users = True
+                self.refresh_user_list()
+                self.set_refreshed_at(refreshed_at)
+
+        self.refresh_button.config(state=tk.DISABLED)
+        self.status_var.set(
+            "Showing the stored user list, reading the device..." if self.showing_stored_users else "Loading users..."
         )
 
-        success = self.processor.connect()
-        if success:
-            self.status_var.set("Connection established")
-        else:
-            self.status_var.set("Connection failed")
+        run_in_background(self.root, self.services.get_users, self.on_users_loaded, force_refresh)
 
-        return success
-
-    def load_users(self):
-        """Load users from the attendance processor"""
-        # Ensure the processor is initialized
-        if not self.processor:
-            if not self.initialize():
-                logger.error("Failed to initialize attendance processor")
-                return
+    def on_users_loaded(self, future: Future):
+        """Display the users once the background device read has finished."""
+        self.refresh_button.config(state=tk.NORMAL)
 
         try:
-            # Update status
-            self.status_var.set("Loading users...")
-            self.root.update()  # Force UI update
-
-            # Retrieve users from the attendance processor
-            users = self.processor.get_users()
-            if not users:
-                logger.info("No users found from attendance processor.")
-                self.users = []
-                self.status_var.set("No users found")
+            users, refreshed_at = future.result()
+        except Exception as e:
+            if self.showing_stored_users:
+                # The stored list stays usable, so don't interrupt with a dialog
+                logger.error(f"Error loading users from attendance processor: {e}")
+                self.status_var.set(f"Device unavailable, showing the stored user list: {e}")
                 return
+            self.handle_error("Error loading users from attendance processor", e)
+            return
+
+        if not users and self.users:
+            # A device that had users reporting none is far more likely a bad read than a wiped device;
+            # keep the list and its refresh time rather than showing an empty, freshly "refreshed" list
+            logger.error("Device returned no users, keeping the displayed user list")
+            self.status_var.set("Error: the device returned no users, showing the previous user list")
+            return
+
+        self.showing_stored_users = False
 
+        if users:
             logger.info(f"Loaded {len(users)} users from attendance processor")
-            self.users = users
-            self.status_var.set(f"{len(users)} users loaded")
+        else:
+            logger.info("No users found from attendance processor.")
 
-        except Exception as e:
-            self.handle_error("Error loading users from attendance processor", e)
+        self.users = users
+        self.refresh_user_list()
+        self.set_refreshed_at(refreshed_at)
 
-    def refresh_data(self):
+    def set_refreshed_at(self, refreshed_at: Optional[str]):
+        """Show when the displayed user list was read from the device."""
+        if refreshed_at:
+            refreshed = datetime.strptime(refreshed_at, REFRESHED_AT_FORMAT)
+            shown = refreshed.strftime("%H:%M" if refreshed.date() == datetime.now().date() else "%Y-%m-%d %H:%M")
+            self.refreshed_var.set(f"Last refreshed: {shown}")
+
+    def refresh_data(self, force_refresh: bool = False):
         """Refresh the user data and update the display"""
-        self.load_users()
-        self.refresh_user_list()
+        self.load_users(force_refresh)
 
     def import_users(self):
-        """Import users using the UserImporter and refresh the display"""
-        try:
-            self.status_var.set("Importing users...")
-            self.root.update()  # Force UI update
+        """Import users in the background using the UserImporter, then refresh the display"""
+        if self.user_importer is None:
+            self.user_importer = UserImporter(self.db_manager, services=self.services)
+
+        self.import_button.config(state=tk.DISABLED)
+        self.status_var.set("Importing users...")
+
+        run_in_background(self.root, self.user_importer.import_users, self.on_import_done)
+
+    def on_import_done(self, future: Future):
+        """Add the imported users to the list once the background import has finished."""
+        self.import_button.config(state=tk.NORMAL)
 
-            imported = self.user_importer.import_users()
-            self.show_success(f"{imported} users imported successfully")
-            self.load_users()  # Reload the user list after import
-            self.refresh_user_list()  # Refresh the display
+        try:
+            imported = future.result()
         except Exception as e:
             self.handle_error("Error importing users", e)
+            return
+
+        if isinstance(imported, dict):
+            # The importer reports setup failures as a result dict instead of raising
+            self.handle_error("Error importing users", imported.get("message"))
+            return
+
+        added_users = self.user_importer.added_users
+        if added_users:
+            self.add_users(added_users)
+        self.show_success(f"{imported} users imported successfully", silent=True)
+
+    def add_users(self, added_users):
+        """Append (user_id, name) pairs to the user list without re-reading the device or refilling the tree."""
+        # Keep the list homogeneous, refresh_user_list picks its row extractor from the first user
+        if self.users and not isinstance(self.users[0], dict):
+            new_users = [SimpleNamespace(user_id=user_id, name=name) for user_id, name in added_users]
+        else:
+            new_users = [{"id": user_id, "name": name} for user_id, name in added_users]
+
+        # A new list, so the one shared through the caches isn't modified
+        self.users = (self.users or []) + new_users
+        self.users_by_id.update((user_id, user) for (user_id, _), user in zip(added_users, new_users))
+
+        all_rows_shown = self.rendered_rows == len(self.user_rows)
+        self.user_rows += tuple(added_users)
+        if all_rows_shown:
+            # Otherwise the new rows are inserted with the later pages as the view scrolls
+            self.insert_next_page()
 
     def refresh_user_list(self):
         """Update the treeview with current user data"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Unmap the tree while it is refilled so Tk lays it out once; grid_remove keeps its grid options
+        self.tree.grid_remove()
+
+        # Clear existing items in a single Tcl call
+        self.tree.delete(*self.tree.get_children())
+
+        self.user_rows = ()
+        self.rendered_rows = 0
+        self.users_by_id = {}
 
         # If no users, display a message in the status bar
-        if not self.users or len(self.users) == 0:
+        if not self.users:
+            self.tree.grid()
             self.status_var.set("No users to display")
             return
 
-        # Insert user data into the treeview
-        for user in self.users:
-            user_id = user.get("id", "N/A") if isinstance(user, dict) else getattr(user, "user_id", "N/A")
-            name = user.get("name", "N/A") if isinstance(user, dict) else getattr(user, "name", "N/A")
-            self.tree.insert("", tk.END, values=(user_id, name))
+        # Users are either all dicts or all device user objects; check once, not per row
+        if isinstance(self.users[0], dict):
+            self.user_rows = tuple((user.get("id", "N/A"), user.get("name", "N/A")) for user in self.users)
+        else:
+            self.user_rows = tuple((getattr(user, "user_id", "N/A"), getattr(user, "name", "N/A")) for user in self.users)
+
+        # Tk may hand tree values back as ints or strings, so key the users by the string form of their ID
+        self.users_by_id = {str(row[0]): user for row, user in zip(self.user_rows, self.users)}
+
+        # Only the first page goes into the tree now; the rest follows as the view scrolls
+        self.insert_next_page()
+        self.tree.grid()
 
         # Update status message
         self.status_var.set(f"Displaying {len(self.users)} users")
 
     def on_user_double_click(self, event):
         """Handle double-click on a user row (placeholder for future functionality)"""
-        item = self.tree.selection()[0] if self.tree.selection() else None
+        selection = self.tree.selection()
+        item = selection[0] if selection else None
         if item:
             values = self.tree.item(item, "values")
             user_id = values[0]
             # Placeholder for future user detail view
+            self.selected_user = self.users_by_id.get(str(user_id))
             self.status_var.set(f"Selected user ID: {user_id}")
 
     def show_error(self, message: str):
@@ -252,10 +366,11 @@ class UsersInterface:
         self.status_var.set(f"Error: {message}")
         messagebox.showerror("Error", message, parent=self.root)
 
-    def show_success(self, message: str):
-        """Show a success message dialog and update status bar"""
+    def show_success(self, message: str, silent: bool = False):
+        """Update the status bar and, unless silent, show a success message dialog"""
         self.status_var.set(message)
-        messagebox.showinfo("Success", message, parent=self.root)
+        if not silent:
+            messagebox.showinfo("Success", message, parent=self.root)
 
     def handle_error(self, message: str, exception: Exception):
         """Log and display errors with context"""